@@ -0,0 +1,144 @@
+import numpy as np
+
+from components import DEFAULT_MATURITY_DATES
+from term_structure import CONTINUOUS, growth_factors
+
+class BacktestResult:
+    """
+    Positions opened by a Backtest and their outcome.
+
+    Every attribute in POSITION_FIELDS is an array with one entry per position. Positions whose
+    maturity falls inside the series are realized at their maturity tick; the others are still open
+    at the end of the backtest. pnl is the cumulative realized P&L at every tick.
+    """
+
+    POSITION_FIELDS = ("open_tick", "maturity_tick", "maturity_days", "sell_price", "future_price", "amount", "expected_earnings", "realized_pnl", "realized")
+
+    def __init__(self, positions, pnl):
+        for field in self.POSITION_FIELDS:
+            setattr(self, field, positions[field])
+        self.pnl = pnl
+
+    def __len__(self):
+        return len(self.open_tick)
+
+    def summary(self):
+        realized_pnl = self.realized_pnl[self.realized]
+        return {
+            "positions": len(self),
+            "realized_positions": int(realized_pnl.size),
+            "open_positions": int(len(self) - realized_pnl.size),
+            "realized_pnl": float(realized_pnl.sum()),
+            "open_expected_earnings": float(self.expected_earnings[~self.realized].sum()),
+            "win_rate": float((realized_pnl > 0).mean()) if realized_pnl.size else 0.0,
+        }
+
+class Backtest:
+    """
+    Vectorized carry trade backtest over a time series of order books and a time-varying rate.
+
+    ask_prices and ask_amounts are (ticks, levels) arrays with asks sorted lowest price first (the
+    layout of OrderBookGenerator.generate_order_books or a BookReplay), rates is the base rate at
+    every tick (or a single float) and step_days the time between ticks in days (1 / 1440 for
+    minute data).
+
+    At every tick the strategy prices the futures off the best ask with that tick's rate as a flat
+    rate under `compounding` (see term_structure), exactly like MarketMaker.carry_trade_strategy
+    with a FlatRate term structure, and opens the best trades_per_tick quotes whose expected
+    earnings exceed min_earnings. Positions are held to maturity; if funding_rates is given, the
+    spot purchase is financed at that rate path and the funding cost is deducted from the
+    realized P&L. Ticks are processed in batches with one broadcast per batch; a batch holds at
+    most max_elements (tick, level, maturity) earnings, so memory stays bounded however deep the
+    books are.
+    """
+
+    MAX_BATCH_ELEMENTS = 1 << 22  # About 32 MB of float64 earnings (plus argpartition scratch) per batch
+
+    def __init__(self, ask_prices, ask_amounts, rates, step_days=1 / 1440, maturity_dates=None, funding_rates=None, compounding=CONTINUOUS, frequency=1):
+        self.ask_prices = np.asarray(ask_prices, dtype=float)
+        self.ask_amounts = np.asarray(ask_amounts)
+        ticks = len(self.ask_prices)
+        self.rates = np.broadcast_to(np.asarray(rates, dtype=float), (ticks,))
+        self.step_days = step_days
+        self.maturity_dates = np.asarray(DEFAULT_MATURITY_DATES if maturity_dates is None else maturity_dates, dtype=float)
+        self.funding_rates = None if funding_rates is None else np.broadcast_to(np.asarray(funding_rates, dtype=float), (ticks,))
+        self.compounding = compounding
+        self.frequency = frequency
+
+    @classmethod
+    def from_order_books(cls, order_books, rates, **kwargs):
+        """
+        Builds a backtest from a generate_order_books batch.
+        """
+        return cls(order_books["ask"]["price"], order_books["ask"]["amount"], rates, **kwargs)
+
+    def _select_trades(self, start, stop, trades_per_tick, min_earnings):
+        prices = self.ask_prices[start:stop]
+        amounts = self.ask_amounts[start:stop]
+        ticks, levels = prices.shape
+        maturities = len(self.maturity_dates)
+
+        factors = growth_factors(self.rates[start:stop, np.newaxis], self.maturity_dates, self.compounding, self.frequency)  # (ticks, maturities)
+        future_prices = prices[:, :1] * factors
+        earnings = (future_prices[:, np.newaxis, :] - prices[:, :, np.newaxis]) * amounts[:, :, np.newaxis]
+        earnings = earnings.reshape(ticks, levels * maturities)
+
+        if trades_per_tick == 1:
+            best = earnings.argmax(axis=1)[:, np.newaxis]
+        else:
+            best = np.argpartition(-earnings, trades_per_tick - 1, axis=1)[:, :trades_per_tick]
+        best_earnings = np.take_along_axis(earnings, best, axis=1)
+        level, maturity = np.divmod(best, maturities)
+        tick = np.broadcast_to(np.arange(ticks)[:, np.newaxis], best.shape)
+
+        selected = best_earnings > min_earnings
+        tick, level, maturity = tick[selected], level[selected], maturity[selected]
+        return {
+            "open_tick": tick + start,
+            "maturity_days": self.maturity_dates[maturity],
+            "sell_price": prices[tick, level],
+            "future_price": future_prices[tick, maturity],
+            "amount": amounts[tick, level],
+            "expected_earnings": best_earnings[selected],
+        }
+
+    def run(self, trades_per_tick=1, min_earnings=0.0, batch_size=None, max_elements=MAX_BATCH_ELEMENTS):
+        """
+        Runs the backtest and returns a BacktestResult.
+
+        batch_size is the number of ticks per batch; by default (and at most) it is as many ticks
+        as fit in max_elements earnings. An empty series gives an empty result.
+        """
+        ticks = len(self.ask_prices)
+        levels = self.ask_prices.shape[1] if self.ask_prices.ndim == 2 else 0
+        quotes_per_tick = levels * len(self.maturity_dates)
+        trades_per_tick = min(trades_per_tick, quotes_per_tick)
+
+        max_batch_size = max(1, max_elements // max(1, quotes_per_tick))
+        batch_size = max_batch_size if batch_size is None else max(1, min(batch_size, max_batch_size))
+
+        batches = []
+        if trades_per_tick > 0:
+            for start in range(0, ticks, batch_size):
+                batches.append(self._select_trades(start, min(start + batch_size, ticks), trades_per_tick, min_earnings))
+
+        fields = ("open_tick", "maturity_days", "sell_price", "future_price", "amount", "expected_earnings")
+        positions = {field: np.concatenate([batch[field] for batch in batches]) if batches else np.empty(0) for field in fields}
+        positions["open_tick"] = positions["open_tick"].astype(np.int64)
+
+        positions["maturity_tick"] = positions["open_tick"] + np.ceil(positions["maturity_days"] / self.step_days).astype(np.int64)
+        positions["realized"] = positions["maturity_tick"] < ticks
+
+        if self.funding_rates is None:
+            positions["realized_pnl"] = positions["expected_earnings"].copy()
+        else:
+            # Funding growth between two ticks from the cumulative integral of the funding rate path
+            cumulative_funding = np.concatenate(([0.0], np.cumsum(self.funding_rates * self.step_days / 365)))
+            funding_end = np.minimum(positions["maturity_tick"], ticks)
+            funding_growth = np.exp(cumulative_funding[funding_end] - cumulative_funding[positions["open_tick"]])
+            positions["realized_pnl"] = (positions["future_price"] - positions["sell_price"] * funding_growth) * positions["amount"]
+
+        realized = positions["realized"]
+        pnl = np.bincount(positions["maturity_tick"][realized], weights=positions["realized_pnl"][realized], minlength=ticks).cumsum()
+
+        return BacktestResult(positions, pnl)
@@ -0,0 +1,139 @@
+"""
+Benchmarks for the simulator hot paths, built on pytest-benchmark.
+
+A baseline of the whole suite is committed in .benchmarks/ (pytest-benchmark keeps one folder per
+machine, interpreter and architecture). Compare a run against it (fails if any mean regressed by
+more than 10%):
+
+    pytest benchmark.py --benchmark-compare=0001 --benchmark-compare-fail=mean:10%
+
+Timings only compare on similar hardware: on another machine, store a baseline of your own first
+and compare against that (pytest-benchmark numbers the saved runs 0001, 0002, ...):
+
+    pytest benchmark.py --benchmark-save=baseline
+
+Use -k to select a path, e.g. pytest benchmark.py -k "strategy and 1000".
+"""
+import random
+
+import pytest
+
+import client
+from components import OrderBookGenerator, MarketDataManager, MarketMaker, DEFAULT_MATURITY_DATES
+from term_structure import YieldCurve
+
+DEPTHS = [15, 100, 1000, 10000, 100000]
+TABLE_DEPTHS = [15, 100, 1000, 10000]  # tabulate formatting is too slow to repeat on deeper books
+MATURITY_COUNTS = [5, 30]
+
+def maturity_grid(count):
+    if count <= len(DEFAULT_MATURITY_DATES):
+        return DEFAULT_MATURITY_DATES[:count]
+    return [round(365 * (i + 1) / count) for i in range(count)]
+
+def build_market_maker(depth):
+    random.seed(depth)
+    market_data_manager = MarketDataManager(OrderBookGenerator("Benchmark Asset"))
+    market_data_manager.update_order_book(max_ask_items=depth, max_bid_items=depth)
+    return MarketMaker(market_data_manager, base_rate=0.03)
+
+class FakeWindow:
+    """
+    Stand-in for a curses window, so redraw benchmarks measure the client's own work without a terminal.
+    """
+
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+
+    def getmaxyx(self):
+        return self.height, self.width
+
+    def border(self, *args):
+        pass
+
+    def addstr(self, *args):
+        pass
+
+    def noutrefresh(self):
+        pass
+
+@pytest.fixture
+def curses_colors(monkeypatch):
+    # curses.color_pair needs an initialized terminal; this is the COLOR_PAIR(n) macro it computes
+    monkeypatch.setattr(client.curses, "color_pair", lambda pair: pair << 8)
+
+@pytest.mark.benchmark(group="generate_order_book")
+@pytest.mark.parametrize("depth", DEPTHS)
+def test_generate_order_book(benchmark, depth):
+    order_book_generator = OrderBookGenerator("Benchmark Asset")
+    benchmark(order_book_generator.generate_order_book, max_ask_items=depth, max_bid_items=depth)
+
+@pytest.mark.benchmark(group="generate_order_books")
+@pytest.mark.parametrize("depth", DEPTHS)
+def test_generate_order_books_batch(benchmark, depth):
+    order_book_generator = OrderBookGenerator("Benchmark Asset")
+    benchmark(order_book_generator.generate_order_books, num_books=max(1, 100000 // depth), max_ask_items=depth, max_bid_items=depth, seed=0)
+
+@pytest.mark.benchmark(group="carry_trade_strategy")
+@pytest.mark.parametrize("maturities", MATURITY_COUNTS)
+@pytest.mark.parametrize("depth", DEPTHS)
+def test_carry_trade_strategy(benchmark, depth, maturities):
+    market_maker = build_market_maker(depth)
+    benchmark(market_maker.carry_trade_strategy, N=maturities, maturity_dates=maturity_grid(maturities))
+
+@pytest.mark.benchmark(group="carry_trade_matrix")
+@pytest.mark.parametrize("maturities", MATURITY_COUNTS)
+@pytest.mark.parametrize("depth", DEPTHS)
+def test_carry_trade_matrix(benchmark, depth, maturities):
+    market_maker = build_market_maker(depth)
+    benchmark(market_maker.carry_trade_matrix, N=maturities, maturity_dates=maturity_grid(maturities))
+
+@pytest.mark.benchmark(group="term_structure")
+@pytest.mark.parametrize("maturities", MATURITY_COUNTS + [365, 3650])
+def test_term_structure_growth_factors(benchmark, maturities):
+    curve = YieldCurve([30, 90, 180, 365, 730], [0.02, 0.025, 0.03, 0.035, 0.04])
+    benchmark(curve.growth_factors, maturity_grid(maturities))
+
+@pytest.mark.benchmark(group="top_trades")
+@pytest.mark.parametrize("depth", DEPTHS)
+def test_top_trades(benchmark, depth):
+    market_maker = build_market_maker(depth)
+    benchmark(market_maker.top_trades, k=5)
+
+@pytest.mark.benchmark(group="display_strategy_quotes")
+@pytest.mark.parametrize("depth", TABLE_DEPTHS)
+def test_display_strategy_quotes(benchmark, depth):
+    market_maker = build_market_maker(depth)
+    carry_trade_quotes = market_maker.carry_trade_strategy()
+    benchmark(market_maker.display_strategy_quotes, carry_trade_quotes)
+
+@pytest.mark.benchmark(group="display_strategy_quotes_page")
+@pytest.mark.parametrize("depth", DEPTHS)
+def test_display_strategy_quotes_page(benchmark, depth):
+    market_maker = build_market_maker(depth)
+    carry_trade_quotes = market_maker.carry_trade_strategy()
+    benchmark(market_maker.display_strategy_quotes, carry_trade_quotes, limit=40)
+
+@pytest.mark.benchmark(group="client_redraw")
+@pytest.mark.parametrize("depth", [15, 40])
+def test_redraw_order_book(benchmark, curses_colors, depth):
+    order_book = build_market_maker(depth).market_data_manager.current_order_book
+
+    def redraw():
+        window = client.DirtyWindow(FakeWindow(40, 32))
+        window.update(order_book, lambda height, width: client.order_book_lines(order_book, height, width))
+
+    benchmark(redraw)
+
+@pytest.mark.benchmark(group="client_redraw")
+@pytest.mark.parametrize("depth", TABLE_DEPTHS)
+def test_redraw_ct_results(benchmark, curses_colors, depth):
+    market_maker = build_market_maker(depth)
+    carry_trade_table = market_maker.display_strategy_quotes(market_maker.carry_trade_strategy())
+
+    def redraw():
+        window = client.DirtyWindow(FakeWindow(40, 112))
+        window.update(carry_trade_table, lambda height, width: client.ct_results_lines(carry_trade_table, height, width))
+
+    benchmark(redraw)
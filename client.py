@@ -2,12 +2,11 @@ import sys
 import time
 import threading
 import curses
-import threading
 
 import argparse
 
-from copy import deepcopy
 from components import OrderBookGenerator, MarketDataManager, MarketMaker
+from instrumentation import STATS
 
 # Variable to track if curses is active
 CURSES_ACTIVE = True
@@ -18,66 +17,176 @@ CURSES_ACTIVE = True
 
 ORDER_BOOK_START = None
 MARKET_MAKER = None
-CARRY_TRADE_QUOTES = None
-CARRY_TRADE_TABLE = None
-LOG_HISTORY = None
-
-# Create a lock object for synchronizing access to window updates
-LOCK = threading.Lock()
-
-def display_log(win):
-    
-    while CURSES_ACTIVE:
-        time.sleep(0.1)
-        with LOCK:  # Ensure only one thread updates at a time
-            win.clear()
-            win.border('|', '|', '-', '-', '+', '+', '+', '+') # Use ASCII characters for border: '|' for vertical, '-' for horizontal
-            # height, width = win.getmaxyx()
-            log_history = LOG_HISTORY  # Get the last 10 log entries
-            for i, log_entry in enumerate(log_history):
-                timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(log_entry['timestamp']))
-                win.addstr(i + 1, 2, timestamp, curses.color_pair(0))
-                win.addstr(i + 1, 2 + len(timestamp) + 1, log_entry['data'])
-            win.refresh()
-
-def display_ct_results(win):
-    
-    global MARKET_MAKER
-    global CARRY_TRADE_TABLE
-    while CURSES_ACTIVE:
-        time.sleep(0.1)
-        with LOCK:  # Ensure only one thread updates at a time
-            win.clear()
-            
-            output = CARRY_TRADE_TABLE
-            
-            max_y, max_x = win.getmaxyx()
-            start_x, start_y = 0, 0
-
-            # Split the output into lines and ensure it fits within the window width
-            lines = str(output).split('\n')
-            for i, line in enumerate(lines):
-                if i < max_y - start_y:  # Ensure we don't exceed the window height
-                    x_pos = start_x
-                    win.addstr(i + start_y, x_pos, line[:max_x - x_pos - 4])
-
-            win.border('|', '|', '-', '-', '+', '+', '+', '+')
-            win.refresh()
+CT_RESULTS_ROWS = None  # Quote rows that fit in the results window, only those are formatted
+
+# Latest published frame: an immutable (order_book, carry_trade_quotes, carry_trade_table,
+# log_history) tuple. publish() replaces it with a single reference assignment and then sets
+# FRAME_READY, so the render loop reads whole frames without taking any lock.
+FRAME = None
+FRAME_READY = threading.Event()
+
+PROFILE_FILE = "client_profile.txt"
+SPLASH_SECONDS = 5  # How long the key bindings are shown at startup, any key skips them
+
+class DirtyWindow:
+    """
+    Curses window that only repaints what changed since the last frame.
+
+    A frame is a dict {(y, x): (text, attr)}. Windows whose source data is unchanged are skipped
+    entirely, and otherwise only positions whose text or attribute changed are rewritten (padded
+    with spaces to erase the previous text). Changes are staged with noutrefresh, so the render
+    loop pushes all windows to the terminal with a single curses.doupdate().
+    """
+
+    def __init__(self, win):
+        self.win = win
+        self.source = None
+        self.lines = {}
+        self.win.border('|', '|', '-', '-', '+', '+', '+', '+') # Use ASCII characters for border: '|' for vertical, '-' for horizontal
+
+    def update(self, source, render):
+        if source is self.source:
+            return False
+        self.source = source
+
+        lines = render(*self.win.getmaxyx())
+        for (y, x), (text, attr) in self.lines.items():
+            if (y, x) not in lines:
+                self.win.addstr(y, x, " " * len(text))
+        for (y, x), (text, attr) in lines.items():
+            previous = self.lines.get((y, x))
+            if previous != (text, attr):
+                padding = len(previous[0]) - len(text) if previous else 0
+                self.win.addstr(y, x, text + " " * max(padding, 0), attr)
+        self.lines = lines
+
+        self.win.noutrefresh()
+        return True
+
+def log_lines(log_history, height, width):
+    lines = {}
+    for i, log_entry in enumerate(log_history[:height - 2]):
+        timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(log_entry['timestamp']))
+        lines[(i + 1, 2)] = (timestamp, curses.color_pair(0))
+        lines[(i + 1, 2 + len(timestamp) + 1)] = (log_entry['data'][:width - len(timestamp) - 5], curses.A_NORMAL)
+    return lines
+
+def ct_results_lines(output, height, width):
+    # The first line and column of the table sit under the window border, so they are not drawn
+    lines = {}
+    for i, line in enumerate(str(output).split('\n')[1:height - 1], start=1):
+        lines[(i, 1)] = (line[1:width - 4], curses.A_NORMAL)
+    return lines
+
+def order_book_lines(order_book, height, width):
+
+    lines = {
+        (1, 5): ("Asks", curses.color_pair(1)),
+        (1, 10): ("Bids", curses.color_pair(2)),
+        (1, 15): ("Order Book", curses.A_BOLD),
+        (3, 5): ("Prices", curses.A_ITALIC),
+        (3, 18): ("Amounts", curses.A_ITALIC),
+    }
+
+    asks = 'ask'
+    bids = 'bid'
+
+    row = 5
+    for ask in sorted(order_book[asks], key=lambda x: x['price'], reverse=True):
+        lines[(row, 1)] = (f"{ask['price']:>10}", curses.color_pair(1))  # Red color for asks
+        lines[(row, 15)] = (f"{ask['amount']:>10}", curses.A_NORMAL)
+        row += 1
+
+    row += 1
+    for bid in order_book[bids]:
+        lines[(row, 1)] = (f"{bid['price']:>10}", curses.color_pair(2))  # Green color for bids
+        lines[(row, 15)] = (f"{bid['amount']:>10}", curses.A_NORMAL)
+        row += 1
+
+    # Calculating and displaying total amounts
+    total_buy_amount = sum(order["amount"] for order in order_book[bids])
+    total_sell_amount = sum(order["amount"] for order in order_book[asks])
+
+    lines[(height - 2, 2)] = ("Total ", curses.color_pair(0))
+    lines[(height - 2, 8)] = ("Bids", curses.color_pair(2))
+    lines[(height - 2, 12)] = (f" amounts {total_buy_amount} units", curses.color_pair(0))
+    lines[(height - 3, 2)] = ("Total ", curses.color_pair(0))
+    lines[(height - 3, 8)] = ("Asks", curses.color_pair(1))
+    lines[(height - 3, 12)] = (f" amounts {total_sell_amount} units", curses.color_pair(0))
+
+    return lines
+
+def publish(order_book, carry_trade_quotes, carry_trade_table, log_history):
+    """
+    Publishes freshly computed data and wakes up the render loop.
+    """
+    global FRAME
+
+    FRAME = (order_book, carry_trade_quotes, carry_trade_table, tuple(log_history))
+    FRAME_READY.set()
+
+@STATS.timed("client.refresh")
+def refresh_market(update_order_book=True):
+    """
+    Recomputes the order book and carry trades outside of any lock, then publishes the results.
+    """
+    if update_order_book:
+        MARKET_MAKER.logger.clear()
+        MARKET_MAKER.market_data_manager.update_order_book()
+
+    carry_trade_quotes = MARKET_MAKER.carry_trade_strategy()
+    carry_trade_table = MARKET_MAKER.display_strategy_quotes(carry_trade_quotes, limit=CT_RESULTS_ROWS)
+    publish(MARKET_MAKER.market_data_manager.current_order_book, carry_trade_quotes, carry_trade_table, MARKET_MAKER.logger.get_logs()[-8:])
+
+def stop_rendering(renderer):
+    global CURSES_ACTIVE
+
+    CURSES_ACTIVE = False
+    FRAME_READY.set()
+    renderer.join()
+
+def render_loop(order_book_window, ct_results_window, log_window):
+    """
+    Single render loop: sleeps until a new frame is published, then redraws only the dirty windows.
+    """
+    rendered_frame = None
+    while True:
+        FRAME_READY.wait()
+        # Cleared before reading FRAME, so a frame published from now on sets the event again
+        FRAME_READY.clear()
+        if not CURSES_ACTIVE:
+            return
+        frame = FRAME
+        if frame is rendered_frame:
+            continue
+        rendered_frame = frame
+        order_book, _, carry_trade_table, log_history = frame
+
+        with STATS.timer("client.render"):
+            dirty = order_book_window.update(order_book, lambda height, width: order_book_lines(order_book, height, width))
+            dirty |= ct_results_window.update(carry_trade_table, lambda height, width: ct_results_lines(carry_trade_table, height, width))
+            dirty |= log_window.update(log_history, lambda height, width: log_lines(log_history, height, width))
+            if dirty:
+                curses.doupdate()
 
 def init_msg(stdscr):
-    """Displays an initial message with action keys for 3 seconds."""
+    """Displays an initial message with action keys for SPLASH_SECONDS, or until a key is pressed."""
+    if SPLASH_SECONDS <= 0:
+        return
+
     stdscr.clear()
     height, width = stdscr.getmaxyx()
 
     # Define the message text
     instructions = [
         "",
-        "Starting in 5 seconds..",
+        f"Starting in {SPLASH_SECONDS:g} seconds, press any key to skip..",
         "",
         "Key Bindings:",
         "",
         "- 'r' to refresh the orderbook and re-calculate trades ",
         "- 'd' to enter debug mode",
+        "- 'p' to start / stop profiling",
         "- 'q' to quit the simulator client",
     ]
 
@@ -96,22 +205,20 @@ def init_msg(stdscr):
         msg_win.addstr(idx, 3, line)
 
     msg_win.refresh()
-    time.sleep(5)  # Display the message for 5 seconds
+    stdscr.timeout(int(SPLASH_SECONDS * 1000))  # Wait for a key press at most SPLASH_SECONDS
+    stdscr.getch()
+    stdscr.timeout(-1)
     stdscr.clear()
     stdscr.refresh()
 
 def create_windows(stdscr):
     
-    global MARKET_MAKER
-    global CARRY_TRADE_TABLE
-    global LOG_HISTORY
+    global CURSES_ACTIVE, CT_RESULTS_ROWS, SPLASH_SECONDS
 
     # Call the init_msg function to display the initial instructions
     init_msg(stdscr)
 
-    CARRY_TRADE_QUOTES = MARKET_MAKER.carry_trade_strategy()
-    CARRY_TRADE_TABLE = MARKET_MAKER.display_strategy_quotes(CARRY_TRADE_QUOTES)
-    LOG_HISTORY = MARKET_MAKER.logger.get_logs()[-8:]
+    CURSES_ACTIVE = True
 
     curses.curs_set(0)  # Hide the cursor
     curses.start_color()  # Enable color functionality
@@ -121,6 +228,7 @@ def create_windows(stdscr):
     curses.init_pair(2, curses.COLOR_GREEN, curses.COLOR_BLACK)  # Color pair 2: Green text
 
     stdscr.clear()
+    stdscr.refresh()  # Flush the cleared screen now so getch() does not repaint over the windows later
     height, width = stdscr.getmaxyx()
 
     # Calculate the dimensions for the windows based on the specification
@@ -140,114 +248,60 @@ def create_windows(stdscr):
     window3_start_y = height - 10
     window3_start_x = 0
 
+    # The results window shows the table without its top border, minus its own border, header and separator
+    CT_RESULTS_ROWS = window2_height - 4
+    refresh_market(update_order_book=False)
+
     # Create windows
-    window1 = curses.newwin(window1_height, window1_width, window1_start_y, window1_start_x)
-    window2 = curses.newwin(window2_height, window2_width, window2_start_y, window2_start_x)
-    window3 = curses.newwin(window3_height, window3_width, window3_start_y, window3_start_x)
-
-    # Start threads for each window
-    thread1 = threading.Thread(target=display_order_book, args=(window1,), daemon=True)
-    thread2 = threading.Thread(target=display_ct_results, args=(window2,), daemon=True)
-    thread3 = threading.Thread(target=display_log, args=(window3,), daemon=True)
-    
-    thread1.start()
-    thread2.start()
-    thread3.start()
+    window1 = DirtyWindow(curses.newwin(window1_height, window1_width, window1_start_y, window1_start_x))
+    window2 = DirtyWindow(curses.newwin(window2_height, window2_width, window2_start_y, window2_start_x))
+    window3 = DirtyWindow(curses.newwin(window3_height, window3_width, window3_start_y, window3_start_x))
+
+    # Start the render loop, it only wakes up when new data is published
+    renderer = threading.Thread(target=render_loop, args=(window1, window2, window3), daemon=True)
+    renderer.start()
 
-    # Keep the main loop running to maintain the window display
+    # Keep the main loop running to handle key presses
     while True:
         key = stdscr.getch()
         if key == ord('q'):  # Press 'q' to exit the program
+            stop_rendering(renderer)
             break
-        elif key == ord('d'):  # Press 'd' to toggle debugging
+        elif key == ord('d'):  # Press 'd' to enter debug mode
             
-            global CURSES_ACTIVE
-            CURSES_ACTIVE = not CURSES_ACTIVE
-            if CURSES_ACTIVE:
-                # Re-enter curses mode
-                curses.wrapper(create_windows)
-            else:
-                # Exit curses mode, print debug information
-                curses.endwin()
-                stdscr.clear()
-                print("Debugging mode activated. Press 'c' to continue in curses.")
-                import ipdb; ipdb.set_trace()
-                # Once done debugging, you can return to curses mode by restarting it
-                curses.wrapper(create_windows)
+            stop_rendering(renderer)
+
+            # Exit curses mode, print debug information
+            curses.endwin()
+            print("Debugging mode activated. Press 'c' to continue in curses.")
+            import ipdb; ipdb.set_trace()
+            # Once done debugging, return to curses mode by restarting it, without the splash
+            SPLASH_SECONDS = 0
+            curses.wrapper(create_windows)
+            break
         
         elif key == ord('r'):
-            
-            with LOCK:
-
-                MARKET_MAKER.logger.log_history = []
-                MARKET_MAKER.market_data_manager.update_order_book()
-                CARRY_TRADE_QUOTES = MARKET_MAKER.carry_trade_strategy()
-                CARRY_TRADE_TABLE = MARKET_MAKER.display_strategy_quotes(CARRY_TRADE_QUOTES)
-                LOG_HISTORY = MARKET_MAKER.logger.get_logs()[-8:]
-
-                stdscr.clear()
-
-def display_order_book(win):
-
-    while CURSES_ACTIVE:
-        time.sleep(0.1)
-        with LOCK:  # Ensure only one thread updates at a time
-            
-            order_book = MARKET_MAKER.market_data_manager.current_order_book
-
-            win.clear()
-            win.border('|', '|', '-', '-', '+', '+', '+', '+')
-            win.addstr(1, 5, "Asks", curses.color_pair(1))
-            win.addstr(1, 10, "Bids", curses.color_pair(2))
-            win.addstr(1, 15, "Order Book", curses.A_BOLD)
-
-            win.addstr(3, 5, "Prices", curses.A_ITALIC)
-            win.addstr(3, 18, "Amounts", curses.A_ITALIC)
-
-            asks = 'ask'
-            bids = 'bid'
-
-            row = 5
-            for ask in sorted(order_book[asks], key=lambda x: x['price'], reverse=True):
-                win.addstr(row, 1, f"{ask['price']:>10}", curses.color_pair(1))  # Red color for asks
-                win.addstr(row, 15, f"{ask['amount']:>10}")
-                row += 1
-
-            row += 1
-            for bid in order_book[bids]:
-                win.addstr(row, 1, f"{bid['price']:>10}", curses.color_pair(2))  # Green color for bids
-                win.addstr(row, 15, f"{bid['amount']:>10}")
-                row += 1
-
-            # Calculating and displaying total amounts
-            total_buy_amount = sum(order["amount"] for order in order_book[bids])
-            total_sell_amount = sum(order["amount"] for order in order_book[asks])
-
-            height, width = win.getmaxyx()
-            win.addstr(height - 2, 2, "Total ", curses.color_pair(0))
-            win.addstr(height - 2, 8, "Bids", curses.color_pair(2))
-            win.addstr(height - 2, 12, f" amounts {total_buy_amount} units", curses.color_pair(0))
-            win.addstr(height - 3, 2, "Total ", curses.color_pair(0))
-            win.addstr(height - 3, 8, "Asks", curses.color_pair(1))
-            win.addstr(height - 3, 12, f" amounts {total_sell_amount} units", curses.color_pair(0))
-
-            win.refresh()
+            refresh_market()
 
-if __name__ == "__main__":
-    
-    parser = argparse.ArgumentParser(description='Market Simulator')
-    parser.add_argument('--base_rate', type=float, default=0.03, help='Base rate for the MarketMaker instance (default: 0.03)')
-    parser.add_argument('--debug', action='store_true', help='Run the simulator in debug mode')
-    args = parser.parse_args()
+        elif key == ord('p'):  # Press 'p' to start / stop a cProfile capture of the key handling thread
+            if STATS.profiling:
+                with open(PROFILE_FILE, "w") as profile_file:
+                    profile_file.write(STATS.stop_profile())
+                MARKET_MAKER.logger.log("Profile written to %s", PROFILE_FILE)
+            else:
+                STATS.start_profile()
+                MARKET_MAKER.logger.log("Profiling started, press 'p' again to stop")
+            refresh_market(update_order_book=False)
 
-    if args.debug:
-        CURSES_ACTIVE = False
-        import ipdb; ipdb.set_trace()
+def run(base_rate=0.03, splash_seconds=SPLASH_SECONDS, stats=False):
+    """
+    Runs the visual client in the current process until the user quits.
+    """
+    global MARKET_MAKER, ORDER_BOOK_START, SPLASH_SECONDS
 
-    if args.base_rate:
-        base_rate = args.base_rate
-    else:
-        base_rate = 0.03
+    SPLASH_SECONDS = splash_seconds
+    if stats:
+        STATS.enable()
 
     # Initialize components
     order_book_generator = OrderBookGenerator(asset_name="SYMBOL")
@@ -256,8 +310,8 @@ if __name__ == "__main__":
 
     # Create first orderbook
     MARKET_MAKER.market_data_manager.update_order_book(max_ask_items=15, max_bid_items=15)
-    # Save a copy of initial orderbook values for later use
-    ORDER_BOOK_START = deepcopy(market_data_manager.current_order_book)
+    # Keep the initial orderbook for later use, published books are immutable so no copy is needed
+    ORDER_BOOK_START = market_data_manager.current_order_book
 
     height, width = curses.initscr().getmaxyx()
     curses.endwin()  # End the window to avoid issues with terminal state
@@ -266,4 +320,21 @@ if __name__ == "__main__":
         print(f"\nDISPLAY ERROR: The terminal size is {width}x{height}.\nIt must be at least 125x50 to run the simulator in visual mode.\n")
     else:
         curses.wrapper(create_windows)
-    
\ No newline at end of file
+
+    if stats:
+        print(STATS.format_snapshot())
+
+if __name__ == "__main__":
+    
+    parser = argparse.ArgumentParser(description='Market Simulator')
+    parser.add_argument('--base_rate', '--base-rate', type=float, default=0.03, help='Base rate for the MarketMaker instance (default: 0.03)')
+    parser.add_argument('--debug', action='store_true', help='Run the simulator in debug mode')
+    parser.add_argument('--stats', action='store_true', help='Collect per-stage timings and print them on exit')
+    parser.add_argument('--no-splash', action='store_true', help='Start without showing the key bindings first')
+    args = parser.parse_args()
+
+    if args.debug:
+        CURSES_ACTIVE = False
+        import ipdb; ipdb.set_trace()
+
+    run(args.base_rate, splash_seconds=0 if args.no_splash else SPLASH_SECONDS, stats=args.stats)
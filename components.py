@@ -1,28 +1,800 @@
+import heapq
+import queue
 import random
-import math
+import threading
 import time
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 
-from tabulate import tabulate
+import numpy as np
+
+from instrumentation import STATS
+from term_structure import FlatRate, TermStructure, growth_factors
 
 VERBOSE = False
 
+DEFAULT_MATURITY_DATES = [30, 60, 90, 180, 365]  # Default maturity dates in days
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+
+def format_log_entry(log_entry):
+    timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(log_entry['timestamp']))
+    level = LEVEL_NAMES.get(log_entry['level'], log_entry['level'])
+    return f"[{timestamp}] {level} {log_entry['data']}"
+
+class LogWriter:
+    """
+    Background thread that appends log entries to a file in batches.
+
+    Entries are queued by Logger.log and written together every flush_interval seconds (or as soon
+    as batch_size entries are waiting), so the caller never blocks on disk I/O.
+    """
+
+    _STOP = object()
+
+    def __init__(self, path, flush_interval=0.5, batch_size=1000):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def write(self, log_entry):
+        self._queue.put(log_entry)
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size and batch[-1] is not self._STOP:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        with open(self.path, "a") as log_file:
+            while True:
+                batch = self._next_batch()
+                stop = batch[-1] is self._STOP
+                if stop:
+                    batch.pop()
+                if batch:
+                    log_file.write("".join(format_log_entry(log_entry) + "\n" for log_entry in batch))
+                    log_file.flush()
+                if stop:
+                    return
+
+    def close(self):
+        self._queue.put(self._STOP)
+        self._thread.join()
+
 class Logger:
-    def __init__(self):
-        self.log_history = []
+    """
+    In-memory logger keeping the last `capacity` entries in a ring buffer.
+
+    Messages below `level` are dropped before any work is done, and extra positional arguments are
+    only %-formatted into the message when the entry is actually kept, so disabled debug logging on
+    hot paths costs a single comparison. Pass log_file to also write entries to disk from a
+    background LogWriter.
+    """
+
+    def __init__(self, capacity=1000, level=INFO, log_file=None, flush_interval=0.5):
+        self.log_history = deque(maxlen=capacity)
+        self.level = level
+        self.writer = LogWriter(log_file, flush_interval) if log_file else None
 
-    def log(self, message, verbose=False):
-        timestamp = time.time()
+    def is_enabled_for(self, level):
+        return level >= self.level
+
+    def log(self, message, *args, verbose=False, level=INFO):
+        if level < self.level:
+            return
+
+        if args:
+            message = message % args
         log_entry = {
-            'timestamp': timestamp,
+            'timestamp': time.time(),
+            'level': level,
             'data': message,
         }
         self.log_history.append(log_entry)
-        
+
+        if self.writer is not None:
+            self.writer.write(log_entry)
         if verbose:
-            print(f"[{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))}] {log_entry['data']}")
+            print(format_log_entry(log_entry))
+
+    def debug(self, message, *args, verbose=False):
+        self.log(message, *args, verbose=verbose, level=DEBUG)
+
+    def warning(self, message, *args, verbose=False):
+        self.log(message, *args, verbose=verbose, level=WARNING)
+
+    def error(self, message, *args, verbose=False):
+        self.log(message, *args, verbose=verbose, level=ERROR)
 
     def get_logs(self):
-        return self.log_history
+        return list(self.log_history)
+
+    def clear(self):
+        self.log_history.clear()
+
+    def close(self):
+        """
+        Flushes and stops the background writer, if any.
+        """
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+class OrderBookLevels:
+    """
+    Read-only, list-like view of one order book side backed by price and amount arrays.
+
+    Items are materialized as {"price": ..., "amount": ...} dicts on access so existing callers keep
+    working, while slicing returns another view over the same arrays without copying.
+    """
+
+    __slots__ = ("prices", "amounts")
+
+    def __init__(self, prices, amounts):
+        self.prices = prices
+        self.amounts = amounts
+
+    def __len__(self):
+        return len(self.prices)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return OrderBookLevels(self.prices[index], self.amounts[index])
+        return {"price": self.prices[index].item(), "amount": self.amounts[index].item()}
+
+    def __iter__(self):
+        for price, amount in zip(self.prices.tolist(), self.amounts.tolist()):
+            yield {"price": price, "amount": amount}
+
+    def __eq__(self, other):
+        if isinstance(other, OrderBookLevels):
+            return np.array_equal(self.prices, other.prices) and np.array_equal(self.amounts, other.amounts)
+        try:
+            return list(self) == list(other)
+        except TypeError:
+            return NotImplemented
+
+    def __repr__(self):
+        return repr(list(self))
+
+class OrderBook:
+    """
+    Compact order book: one contiguous price array (float64) and one amount array per side, best
+    levels first.
+
+    It behaves like the {"bid": [...], "ask": [...]} dict the rest of the simulator passes around
+    (order_book["ask"][0]["price"], iteration, keys()/values(), tabulate), using OrderBookLevels
+    views, while costing 16 bytes per level instead of a dict per level.
+    """
+
+    __slots__ = ("bid_prices", "bid_amounts", "ask_prices", "ask_amounts")
+
+    SIDES = ("bid", "ask")
+
+    def __init__(self, bid_prices, bid_amounts, ask_prices, ask_amounts):
+        self.bid_prices = _price_array(bid_prices)
+        self.bid_amounts = _amount_array(bid_amounts)
+        self.ask_prices = _price_array(ask_prices)
+        self.ask_amounts = _amount_array(ask_amounts)
+
+    @classmethod
+    def from_dict(cls, order_book):
+        """
+        Builds an OrderBook from the {"bid": [...], "ask": [...]} dict format, keeping the level order.
+        """
+        if isinstance(order_book, cls):
+            return order_book
+        return cls(
+            [order["price"] for order in order_book["bid"]],
+            [order["amount"] for order in order_book["bid"]],
+            [order["price"] for order in order_book["ask"]],
+            [order["amount"] for order in order_book["ask"]]
+        )
+
+    def to_dict(self):
+        return {side: list(self[side]) for side in self.SIDES}
+
+    def __getitem__(self, side):
+        if side == "bid":
+            return OrderBookLevels(self.bid_prices, self.bid_amounts)
+        if side == "ask":
+            return OrderBookLevels(self.ask_prices, self.ask_amounts)
+        raise KeyError(side)
+
+    def __iter__(self):
+        return iter(self.SIDES)
+
+    def __len__(self):
+        return len(self.SIDES)
+
+    def __contains__(self, side):
+        return side in self.SIDES
+
+    def keys(self):
+        return list(self.SIDES)
+
+    def values(self):
+        return [self[side] for side in self.SIDES]
+
+    def items(self):
+        return [(side, self[side]) for side in self.SIDES]
+
+    def get(self, side, default=None):
+        return self[side] if side in self.SIDES else default
+
+    def __eq__(self, other):
+        try:
+            return all(self[side] == other[side] for side in self.SIDES)
+        except (KeyError, TypeError):
+            return NotImplemented
+
+    def freeze(self):
+        """
+        Makes the level arrays read-only, so the book can be shared between threads and versions.
+        Arrays that are still writeable may belong to the caller, so they are copied first;
+        arrays that are already read-only are shared as they are. Returns the book.
+        """
+        self.bid_prices = _read_only_copy(self.bid_prices)
+        self.bid_amounts = _read_only_copy(self.bid_amounts)
+        self.ask_prices = _read_only_copy(self.ask_prices)
+        self.ask_amounts = _read_only_copy(self.ask_amounts)
+        return self
+
+    def nbytes(self):
+        """
+        Memory used by the level arrays, in bytes.
+        """
+        return self.bid_prices.nbytes + self.bid_amounts.nbytes + self.ask_prices.nbytes + self.ask_amounts.nbytes
+
+    def __repr__(self):
+        return f"OrderBook(bid={len(self.bid_prices)} levels, ask={len(self.ask_prices)} levels)"
+
+def _read_only(array):
+    """
+    Marks an array the caller has just allocated (and nobody else references) as read-only.
+    """
+    array.setflags(write=False)
+    return array
+
+def _read_only_copy(array):
+    return array if not array.flags.writeable else _read_only(array.copy())
+
+def _price_array(prices):
+    return np.ascontiguousarray(prices, dtype=float)
+
+def _amount_array(amounts):
+    amounts = np.ascontiguousarray(amounts)
+    if amounts.size == 0:
+        return amounts.astype(np.int64)
+    return amounts
+
+class BookSnapshot:
+    """
+    Immutable, versioned order book published by an OrderBookVersions history.
+    """
+
+    __slots__ = ("version", "order_book", "timestamp")
+
+    def __init__(self, version, order_book, timestamp):
+        self.version = version
+        self.order_book = order_book
+        self.timestamp = timestamp
+
+    def __repr__(self):
+        return f"BookSnapshot(version={self.version}, {self.order_book!r})"
+
+class OrderBookVersions:
+    """
+    Copy-on-write history of order book snapshots.
+
+    publish() freezes the book and swaps `latest` to a new BookSnapshot with a single reference
+    assignment, so readers (render threads, strategy workers) read `latest` or any retained version
+    without locking and always see a complete book. Snapshots are never modified after publication,
+    so keeping the last `history` versions costs no copies. Sharing is per side rather than per
+    level: a side's levels are stored in one contiguous array, so a new version allocates the
+    sides that changed and shares the untouched side's arrays with the previous one. Books built
+    over caller-owned (writeable) arrays are copied once on publication. Meant for a single writer.
+    """
+
+    def __init__(self, history=8):
+        self.latest = None
+        self._history = deque(maxlen=history)
+
+    def publish(self, order_book, timestamp=None):
+        version = self.latest.version + 1 if self.latest is not None else 1
+        snapshot = BookSnapshot(version, OrderBook.from_dict(order_book).freeze(), time.time() if timestamp is None else timestamp)
+        self._history.append(snapshot)
+        self.latest = snapshot
+        return snapshot
+
+    def get(self, version):
+        """
+        Returns the snapshot of `version`, or None if it is no longer (or not yet) retained.
+        """
+        history = list(self._history)  # Copied in one step, appends from the writer cannot interleave
+        if not history:
+            return None
+        index = version - history[0].version
+        return history[index] if 0 <= index < len(history) else None
+
+    def history(self):
+        """
+        Returns the retained snapshots, oldest first.
+        """
+        return list(self._history)
+
+    def __len__(self):
+        return len(self._history)
+
+def _level_arrays(levels):
+    """
+    Splits a list of (price, amount) pairs into price and amount arrays.
+    """
+    if not levels:
+        return np.empty(0), np.empty(0, dtype=np.int64)
+    prices, amounts = zip(*levels)
+    return np.array(prices, dtype=float), np.array(amounts, dtype=np.int64)
+
+def carry_trade_quote(sell_price, maturity_days, future_price, amount, expected_earnings):
+    """
+    Builds a quote dict in the format returned by carry_trade_strategy.
+    """
+    return {
+        "sell_price": sell_price,
+        "maturity_days": maturity_days,
+        "future_price": round(future_price, 2),
+        "amount": amount,
+        "expected_earnings": round(expected_earnings, 2)
+    }
+
+def ask_arrays(order_book):
+    """
+    Returns the ask side of an order book as (prices, amounts) arrays.
+    """
+    if isinstance(order_book, OrderBook):
+        return order_book.ask_prices, order_book.ask_amounts
+
+    asks = order_book["ask"]
+    prices = np.array([order["price"] for order in asks], dtype=float)
+    amounts = np.array([order["amount"] for order in asks])
+    return prices, amounts
+
+def spot_price_from(sell_prices):
+    """
+    Spot price every future is priced off: the first ask level, i.e. the lowest sell order of a
+    book sorted by price, as produced by every book source here. The carry trade matrix, top
+    trades, sweeps, fill simulations and calculate_future_price all use this one definition.
+    """
+    return sell_prices[0].item()
+
+class CarryTradeQuotes:
+    """
+    Columnar result of the carry trade strategy.
+
+    Rows are ask levels (in order book order) and columns are maturities, so
+    expected_earnings[i, j] is the earning of buying ask level i and selling the future maturing
+    at maturity_days[j].
+    """
+
+    def __init__(self, sell_prices, amounts, maturity_days, future_prices, expected_earnings):
+        self.sell_prices = sell_prices              # shape (levels,)
+        self.amounts = amounts                      # shape (levels,)
+        self.maturity_days = maturity_days          # shape (maturities,)
+        self.future_prices = future_prices          # shape (maturities,)
+        self.expected_earnings = expected_earnings  # shape (levels, maturities)
+
+    @classmethod
+    def empty(cls, maturity_days):
+        levels = np.empty(0, dtype=float)
+        return cls(levels, levels, maturity_days, np.empty(0, dtype=float), np.empty((0, len(maturity_days)), dtype=float))
+
+    def __len__(self):
+        return self.expected_earnings.size
+
+    def to_dicts(self):
+        """
+        Adapter to the list-of-dicts format returned by carry_trade_strategy, ordered by ask level
+        and then by maturity.
+        """
+        maturity_days = self.maturity_days.tolist()
+        future_prices = [round(future_price, 2) for future_price in self.future_prices.tolist()]
+        earnings = self.expected_earnings.tolist()
+
+        quotes = []
+        for sell_price, amount, row in zip(self.sell_prices.tolist(), self.amounts.tolist(), earnings):
+            for maturity, future_price, expected_earnings in zip(maturity_days, future_prices, row):
+                quotes.append({
+                    "sell_price": sell_price,
+                    "maturity_days": maturity,
+                    "future_price": future_price,
+                    "amount": amount,
+                    "expected_earnings": round(expected_earnings, 2)
+                })
+        return quotes
+
+    def top(self, k=5):
+        """
+        Returns the k quotes with the highest expected earnings, best first, using a partial
+        selection (argpartition) instead of sorting the whole matrix.
+        """
+        earnings = self.expected_earnings.ravel()
+        k = min(k, earnings.size)
+        if k <= 0:
+            return []
+
+        candidates = np.argpartition(-earnings, k - 1)[:k]
+        candidates = candidates[np.lexsort((candidates, -earnings[candidates]))]
+        rows, columns = np.unravel_index(candidates, self.expected_earnings.shape)
+
+        return [
+            carry_trade_quote(
+                self.sell_prices[row].item(),
+                self.maturity_days[column].item(),
+                self.future_prices[column].item(),
+                self.amounts[row].item(),
+                self.expected_earnings[row, column].item()
+            )
+            for row, column in zip(rows.tolist(), columns.tolist())
+        ]
+
+class CarryTradeSweep:
+    """
+    Carry trade earnings for a grid of scenarios on one order book.
+
+    expected_earnings[r, m, l] is the earning of buying ask level l and selling the future maturing
+    at maturity_days[m] when the base rate is rates[r].
+    """
+
+    def __init__(self, rates, maturity_days, sell_prices, amounts, future_prices, expected_earnings):
+        self.rates = rates                          # shape (rates,)
+        self.maturity_days = maturity_days          # shape (maturities,)
+        self.sell_prices = sell_prices              # shape (levels,)
+        self.amounts = amounts                      # shape (levels,)
+        self.future_prices = future_prices          # shape (rates, maturities)
+        self.expected_earnings = expected_earnings  # shape (rates, maturities, levels)
+
+    def best_by_rate(self):
+        """
+        Returns the best trade of every rate scenario as {"maturity_days", "sell_price",
+        "expected_earnings"} arrays, one entry per rate.
+        """
+        rates, maturities, levels = self.expected_earnings.shape
+        if not maturities or not levels:
+            return {"maturity_days": np.empty(0), "sell_price": np.empty(0), "expected_earnings": np.empty(0)}
+
+        best = self.expected_earnings.reshape(rates, maturities * levels).argmax(axis=1)
+        maturity, level = np.divmod(best, levels)
+        return {
+            "maturity_days": self.maturity_days[maturity],
+            "sell_price": self.sell_prices[level],
+            "expected_earnings": self.expected_earnings[np.arange(rates), maturity, level],
+        }
+
+class FillSimulator:
+    """
+    Liquidity-aware execution on the ask ladder of one order book.
+
+    Buying a size walks the asks from the best price up, consuming each level's amount. Prefix sums
+    of amounts and costs are built once, so each query is a binary search (searchsorted) for the
+    level where the size is exhausted plus O(1) arithmetic. Future prices follow the strategy's
+    convention (spot is the first ask, see spot_price_from) and earnings are future_price * filled
+    - fill cost.
+    """
+
+    def __init__(self, sell_prices, amounts, maturity_days, future_prices):
+        order = np.argsort(sell_prices, kind="stable") if np.any(np.diff(sell_prices) < 0) else slice(None)
+        self.sell_prices = sell_prices[order]
+        self.amounts = amounts[order]
+        self.maturity_days = maturity_days
+        self.future_prices = future_prices
+        self.cumulative_amounts = np.concatenate(([0], np.cumsum(self.amounts)))
+        self.cumulative_costs = np.concatenate(([0.0], np.cumsum(self.sell_prices * self.amounts)))
+
+    @property
+    def liquidity(self):
+        return self.cumulative_amounts[-1]
+
+    def fill_many(self, sizes):
+        """
+        Vectorized fills for an array of target sizes. Returns a dict of arrays: "filled" (capped at
+        the available liquidity), "cost", "vwap", "slippage" (vwap minus best ask) and
+        "expected_earnings" with one column per maturity.
+        """
+        sizes = np.atleast_1d(np.asarray(sizes, dtype=float))
+        if not self.sell_prices.size:
+            nan = np.full(sizes.shape, np.nan)
+            return {"filled": np.zeros(sizes.shape), "cost": np.zeros(sizes.shape), "vwap": nan, "slippage": nan,
+                    "expected_earnings": np.zeros((len(sizes), len(self.maturity_days)))}
+
+        filled = np.minimum(sizes, self.liquidity)
+        # Last level touched by each fill: the first prefix sum reaching the filled size
+        level = np.clip(np.searchsorted(self.cumulative_amounts, filled, side="left"), 1, self.sell_prices.size) - 1
+        cost = self.cumulative_costs[level] + (filled - self.cumulative_amounts[level]) * self.sell_prices[level]
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            vwap = np.where(filled > 0, cost / filled, np.nan)
+
+        return {
+            "filled": filled,
+            "cost": cost,
+            "vwap": vwap,
+            "slippage": vwap - self.sell_prices[0],
+            "expected_earnings": self.future_prices[np.newaxis, :] * filled[:, np.newaxis] - cost[:, np.newaxis],
+        }
+
+    def fill(self, size):
+        """
+        Simulates buying `size` units, returning a dict with the same fields as fill_many (earnings
+        as a list aligned with maturity_days).
+        """
+        result = self.fill_many([size])
+        return {
+            "size": size,
+            "filled": result["filled"][0].item(),
+            "cost": result["cost"][0].item(),
+            "vwap": result["vwap"][0].item(),
+            "slippage": result["slippage"][0].item(),
+            "expected_earnings": result["expected_earnings"][0].tolist(),
+        }
+
+class OrderBookSide:
+    """
+    One side of an incremental order book.
+
+    Price levels are kept in a sorted key list searched with bisect, so inserting, updating or
+    deleting a level is a binary search plus a list shift. Bid prices are stored negated, which
+    keeps the best level of either side at index 0.
+    """
+
+    def __init__(self, descending=False):
+        self.descending = descending
+        self._keys = []     # Sorted level keys (negated prices on the bid side)
+        self._amounts = {}  # Price -> amount
+
+    def _key(self, price):
+        return -price if self.descending else price
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, price):
+        return price in self._amounts
+
+    def amount(self, price):
+        return self._amounts.get(price, 0)
+
+    def price_at(self, index):
+        """
+        Returns the price of the level at the given depth (0 is the best level).
+        """
+        key = self._keys[index]
+        return -key if self.descending else key
+
+    def best(self):
+        """
+        Returns the best level as a {"price", "amount"} dict, or None if the side is empty.
+        """
+        if not self._keys:
+            return None
+        price = self.price_at(0)
+        return {"price": price, "amount": self._amounts[price]}
+
+    def set(self, price, amount):
+        """
+        Sets the amount of a price level, inserting the level if it does not exist yet.
+        """
+        if price not in self._amounts:
+            key = self._key(price)
+            self._keys.insert(bisect_left(self._keys, key), key)
+        self._amounts[price] = amount
+
+    def remove(self, price):
+        """
+        Removes a price level. Returns False if the level did not exist.
+        """
+        if price not in self._amounts:
+            return False
+        del self._amounts[price]
+        key = self._key(price)
+        del self._keys[bisect_left(self._keys, key)]
+        return True
+
+    def arrays(self):
+        """
+        Returns (prices, amounts) arrays of all levels, best first.
+        """
+        prices = np.array(self._keys, dtype=float)
+        if self.descending:
+            prices = -prices
+        amounts = self._amounts
+        return prices, np.array([amounts[price] for price in prices.tolist()])
+
+    def levels(self):
+        """
+        Returns all levels best first, in the {"price", "amount"} format used by order books.
+        """
+        amounts = self._amounts
+        if self.descending:
+            return [{"price": -key, "amount": amounts[-key]} for key in self._keys]
+        return [{"price": key, "amount": amounts[key]} for key in self._keys]
+
+class IncrementalOrderBook:
+    """
+    Order book maintained from add/modify/cancel deltas instead of being regenerated.
+
+    A delta is a dict {"action": "add" | "modify" | "cancel", "side": "bid" | "ask", "price": ..., "amount": ...}:
+    "add" adds amount to the level (creating it if needed), "modify" sets the level amount and
+    "cancel" removes the level. A level whose amount drops to 0 or below is removed as well.
+    Levels touched since the last call to pop_changes() are tracked so consumers can process only
+    what changed.
+
+    to_order_book() reuses the (read-only) level arrays of a side that no delta touched since the
+    previous snapshot, so consecutive snapshots share their unchanged sides. Sharing is per side,
+    not per level, since each side is one contiguous array.
+    """
+
+    ACTIONS = ("add", "modify", "cancel")
+
+    def __init__(self):
+        self.sides = {
+            "bid": OrderBookSide(descending=True),
+            "ask": OrderBookSide()
+        }
+        self._changes = {}  # (side, price) -> amount after the change, 0 when the level was removed
+        self._arrays = {}   # Side -> (prices, amounts) of the last snapshot, dropped when the side changes
+
+    @classmethod
+    def from_order_book(cls, order_book):
+        """
+        Builds an incremental book from a snapshot, aggregating orders that share a price.
+        """
+        book = cls()
+        for side in ("bid", "ask"):
+            for order in order_book[side]:
+                book.sides[side].set(order["price"], book.sides[side].amount(order["price"]) + order["amount"])
+        return book
+
+    def best_bid(self):
+        return self.sides["bid"].best()
+
+    def best_ask(self):
+        return self.sides["ask"].best()
+
+    def apply_delta(self, delta):
+        action = delta["action"]
+        if action not in self.ACTIONS:
+            raise ValueError(f"Unknown order book delta action: {action}")
+
+        side = self.sides[delta["side"]]
+        price = delta["price"]
+
+        if action == "cancel":
+            amount = 0
+        elif action == "add":
+            amount = side.amount(price) + delta["amount"]
+        else:
+            amount = delta["amount"]
+
+        if amount <= 0:
+            # A level left without liquidity is removed like a cancel, so it can never be the best level
+            if not side.remove(price):
+                return
+            amount = 0
+        else:
+            side.set(price, amount)
+
+        self._changes[(delta["side"], price)] = amount
+        self._arrays.pop(delta["side"], None)
+
+    def apply_deltas(self, deltas):
+        for delta in deltas:
+            self.apply_delta(delta)
+
+    def pop_changes(self):
+        """
+        Returns the levels changed since the last call as {"side", "price", "amount"} dicts
+        (amount is 0 for removed levels) and resets the change set.
+        """
+        changes = [{"side": side, "price": price, "amount": amount} for (side, price), amount in self._changes.items()]
+        self._changes = {}
+        return changes
+
+    def to_order_book(self):
+        """
+        Returns an OrderBook snapshot, best levels first.
+        """
+        for side in ("bid", "ask"):
+            if side not in self._arrays:
+                prices, amounts = self.sides[side].arrays()
+                self._arrays[side] = (_read_only(prices), _read_only(amounts))
+        bid_prices, bid_amounts = self._arrays["bid"]
+        ask_prices, ask_amounts = self._arrays["ask"]
+        return OrderBook(bid_prices, bid_amounts, ask_prices, ask_amounts)
+
+class CarryTradeRanking:
+    """
+    Carry trade quotes kept ranked by expected earnings.
+
+    The ranking is a bisect-sorted index of (-expected_earnings, sell_price, maturity_days) keys,
+    so when a single ask level changes only its rows are removed and re-inserted. It is only valid
+    for the spot price, term structure and maturities it was built with;
+    MarketMaker.rank_carry_trades rebuilds it from scratch when any of those change.
+    """
+
+    def __init__(self, order_book, spot_price, term_structure, maturity_dates, future_prices):
+        self.order_book = order_book  # IncrementalOrderBook the ranking was built from
+        self.spot_price = spot_price
+        self.term_structure = term_structure
+        self.maturity_dates = list(maturity_dates)
+        self.future_prices = dict(zip(self.maturity_dates, future_prices))
+        self._index = []    # Sorted ranking keys
+        self._amounts = {}  # Sell price -> amount of the ask level
+
+    def is_valid_for(self, order_book, spot_price, term_structure, maturity_dates):
+        return (
+            self.order_book is order_book
+            and self.spot_price == spot_price
+            and self.term_structure is term_structure
+            and self.maturity_dates == list(maturity_dates)
+        )
+
+    def _keys(self, sell_price, amount):
+        return [
+            (-(future_price - sell_price) * amount, sell_price, maturity)
+            for maturity, future_price in self.future_prices.items()
+        ]
+
+    def rebuild(self, ask_levels):
+        self._amounts = {level["price"]: level["amount"] for level in ask_levels}
+        self._index = [key for price, amount in self._amounts.items() for key in self._keys(price, amount)]
+        self._index.sort()
+
+    def update_level(self, sell_price, amount):
+        """
+        Re-ranks the rows of one ask level. An amount of 0 removes the level.
+        """
+        if sell_price in self._amounts:
+            for key in self._keys(sell_price, self._amounts.pop(sell_price)):
+                del self._index[bisect_left(self._index, key)]
+
+        if amount:
+            self._amounts[sell_price] = amount
+            for key in self._keys(sell_price, amount):
+                self._index.insert(bisect_left(self._index, key), key)
+
+    def __len__(self):
+        return len(self._index)
+
+    def _quote(self, key):
+        negative_earnings, sell_price, maturity = key
+        return carry_trade_quote(sell_price, maturity, self.future_prices[maturity], self._amounts[sell_price], -negative_earnings)
+
+    def ranked(self):
+        """
+        Returns all quotes sorted by expected earnings in descending order.
+        """
+        return [self._quote(key) for key in self._index]
+
+    def top(self, k=5):
+        return [self._quote(key) for key in self._index[:k]]
 
 class OrderBookGenerator:
     
@@ -32,150 +804,642 @@ class OrderBookGenerator:
     #def generate_order_book(self, num_orders=10):
     def generate_order_book(self, max_ask_items=10, max_bid_items=10, market_price=100, max_ask_spread=5, max_bid_spread=5):
         """
-        Generates a simulated order book with given number of buy and sell orders.
+        Generates a simulated order book with given number of buy and sell orders, returned as a
+        compact OrderBook.
         """
 
-        order_book = {
-            "bid": [],
-            "ask": []
+        # Same draws in the same order as uniform(0, spread) / randint(1, 100), without their call overhead
+        rand, randrange = random.random, random.randrange
+        bid_spread, ask_spread = max_ask_spread / 100, max_bid_spread / 100
+        bids = [(round(market_price * (1 + bid_spread * rand()), 2), randrange(1, 101)) for _ in range(max_bid_items)]
+        asks = [(round(market_price * (1 - ask_spread * rand()), 2), randrange(1, 101)) for _ in range(max_ask_items)]
+        bid_prices, bid_amounts = _level_arrays(bids)
+        ask_prices, ask_amounts = _level_arrays(asks)
+
+        # Sort the orders; stable sorts keep equal prices in generation order
+        with STATS.timer("order_book.sort"):
+            bid_order = np.argsort(-bid_prices, kind="stable")  # Highest price first
+            ask_order = np.argsort(ask_prices, kind="stable")  # Lowest price first
+
+        return OrderBook(
+            _read_only(bid_prices[bid_order]),
+            _read_only(bid_amounts[bid_order]),
+            _read_only(ask_prices[ask_order]),
+            _read_only(ask_amounts[ask_order])
+        )
+
+    def generate_order_books(self, num_books=1, max_ask_items=10, max_bid_items=10, market_price=100, max_ask_spread=5, max_bid_spread=5, seed=None):
+        """
+        Generates num_books simulated order books at once as NumPy arrays.
+
+        Uses the same price and amount distributions as generate_order_book but draws them from a
+        seeded numpy.random.Generator, so runs with the same seed produce the same books. seed may
+        also be an existing Generator to continue its stream. Returns a dict
+        {"bid": {"price": ..., "amount": ...}, "ask": {...}} of (num_books, items) arrays, with bids
+        sorted highest price first and asks lowest price first.
+        """
+        rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+
+        bid_prices = np.round(market_price * (1 + rng.uniform(0, max_ask_spread / 100, size=(num_books, max_bid_items))), 2)
+        ask_prices = np.round(market_price * (1 - rng.uniform(0, max_bid_spread / 100, size=(num_books, max_ask_items))), 2)
+
+        # Amounts are drawn independently of prices, so only the prices need sorting
+        bid_prices.sort(axis=1)
+        ask_prices.sort(axis=1)
+
+        return {
+            "bid": {
+                "price": np.ascontiguousarray(bid_prices[:, ::-1]),  # Highest price first
+                "amount": rng.integers(1, 101, size=(num_books, max_bid_items))
+            },
+            "ask": {
+                "price": ask_prices,  # Lowest price first
+                "amount": rng.integers(1, 101, size=(num_books, max_ask_items))
+            }
         }
 
-        for _ in range(max_bid_items):
-            price = round(market_price * (1 + random.uniform(0, max_ask_spread / 100)), 2)
-            amount = round(random.randint(1, 100))  # Random amount between 1 and 100
-            order_book["bid"].append({"price": price, "amount": amount})
-        
-        for _ in range(max_ask_items):
-            price = round(market_price * (1 - random.uniform(0, max_bid_spread / 100)), 2)
-            amount = round(random.randint(1, 100))  # Random amount between 1 and 100
-            order_book["ask"].append({"price": price, "amount": amount})
-
-        # Sort the orders
-        order_book["bid"].sort(key=lambda x: x["price"], reverse=True)  # Highest price first
-        order_book["ask"].sort(key=lambda x: x["price"])  # Lowest price first
-        
-        return order_book
+    def iter_order_books(self, total_books, batch_size=10000, seed=None, **kwargs):
+        """
+        Yields generate_order_books batches until total_books have been produced, so large stress
+        runs never hold every book in memory. All batches share one seeded Generator.
+        """
+        rng = np.random.default_rng(seed)
+        remaining = total_books
+        while remaining > 0:
+            num_books = min(batch_size, remaining)
+            yield self.generate_order_books(num_books, seed=rng, **kwargs)
+            remaining -= num_books
+
+    @staticmethod
+    def order_book_from_batch(order_books, index):
+        """
+        Extracts one book from a generate_order_books batch as an OrderBook sharing the batch arrays.
+        """
+        return OrderBook(
+            order_books["bid"]["price"][index],
+            order_books["bid"]["amount"][index],
+            order_books["ask"]["price"][index],
+            order_books["ask"]["amount"][index]
+        )
+
+    def generate_order_book_deltas(self, order_book, num_changes=3, market_price=100, max_ask_spread=5, max_bid_spread=5):
+        """
+        Generates a list of random add/modify/cancel deltas against an IncrementalOrderBook.
+        """
+        deltas = []
+        for _ in range(num_changes):
+            side = random.choice(("bid", "ask"))
+            levels = len(order_book.sides[side])
+            action = random.choice(IncrementalOrderBook.ACTIONS) if levels else "add"
+
+            if action == "add":
+                if side == "bid":
+                    price = round(market_price * (1 + random.uniform(0, max_ask_spread / 100)), 2)
+                else:
+                    price = round(market_price * (1 - random.uniform(0, max_bid_spread / 100)), 2)
+            else:
+                price = order_book.sides[side].price_at(random.randrange(levels))
+
+            deltas.append({"action": action, "side": side, "price": price, "amount": random.randint(1, 100)})
+        return deltas
     
     def display_order_book_table(self, order_book):
         """
         Displays the order book in a tabulated table for easier readability
         """
+        from tabulate import tabulate  # Deferred, only the text output paths need it
+
         print(tabulate(order_book, headers="keys", tablefmt="pretty"))
 
 class MarketDataManager:
+    """
+    Produces the order books the strategies run on.
+
+    Every book assigned to current_order_book is published as a new immutable version in
+    `versions`, so other threads can read current_order_book (or older versions) while the
+    manager keeps updating it. Assigning a book also drops the incremental view of the previous
+    one, so later deltas apply to the assigned book.
+    """
     
-    def __init__(self, order_book_generator, verbose=False):
+    def __init__(self, order_book_generator, verbose=False, logger=None, history=8):
         self.order_book_generator = order_book_generator
-        self.current_order_book = None
+        self.versions = OrderBookVersions(history)
+        self.incremental_order_book = None
+        self.recorder = None  # Optional recording.BookRecorder capturing every produced book
         self.verbose = VERBOSE
-        self.logger = Logger()
+        self.logger = logger if logger is not None else Logger()
+
+    @property
+    def current_order_book(self):
+        snapshot = self.versions.latest
+        return snapshot.order_book if snapshot is not None else None
+
+    @current_order_book.setter
+    def current_order_book(self, order_book):
+        self.versions.publish(order_book)
+        self.incremental_order_book = None  # Rebuilt from the new snapshot on the next delta
 
+    @STATS.timed("order_book.update")
     def update_order_book(self, max_ask_items=15, max_bid_items=15, market_price=100, max_ask_spread=5, max_bid_spread=5):
         """
         Updates the current order book by generating a new one.
         """
         self.current_order_book = self.order_book_generator.generate_order_book(max_ask_items, max_bid_items, market_price, max_ask_spread, max_bid_spread)
+        if self.recorder is not None:
+            self.recorder.record(self.current_order_book)
+        asset = self.order_book_generator.asset_name
+        self.logger.log("Order book updated for asset %s", asset, verbose=self.verbose)
+        STATS.count("books_processed")
+
+    @STATS.timed("order_book.apply_deltas")
+    def apply_order_book_deltas(self, deltas):
+        """
+        Applies add/modify/cancel deltas to the current order book instead of regenerating it.
+        """
+        self.get_incremental_order_book().apply_deltas(deltas)
+        # Published directly: the incremental book is the source of this snapshot and stays valid
+        self.versions.publish(self.incremental_order_book.to_order_book())
+        if self.recorder is not None:
+            self.recorder.record(self.current_order_book)
         asset = self.order_book_generator.asset_name
-        self.logger.log(f"Order book updated for asset {asset}", verbose=self.verbose)
+        self.logger.debug("Applied %d order book deltas for asset %s", len(deltas), asset, verbose=self.verbose)
+        STATS.count("books_processed")
+        STATS.count("deltas_applied", len(deltas))
+
+    def stream_order_book(self, num_changes=3, market_price=100, max_ask_spread=5, max_bid_spread=5):
+        """
+        Simulates a feed tick: generates a few random deltas and applies them to the current order book.
+        """
+        order_book = self.get_incremental_order_book()
+        deltas = self.order_book_generator.generate_order_book_deltas(order_book, num_changes, market_price, max_ask_spread, max_bid_spread)
+        self.apply_order_book_deltas(deltas)
+        return deltas
+
+    def get_incremental_order_book(self):
+        """
+        Returns the incremental view of the current order book, building it from the snapshot if needed.
+        """
+        if self.incremental_order_book is None:
+            if self.current_order_book:
+                self.incremental_order_book = IncrementalOrderBook.from_order_book(self.current_order_book)
+            else:
+                self.incremental_order_book = IncrementalOrderBook()
+        return self.incremental_order_book
+
+    def pop_changed_levels(self):
+        """
+        Returns the levels changed by deltas since the last call, for strategies that only need to
+        re-evaluate what moved.
+        """
+        if self.incremental_order_book is None:
+            return []
+        return self.incremental_order_book.pop_changes()
+
+class GrowthFactorCache:
+    """
+    Bounded LRU cache of growth factors keyed by (term structure, maturity_days). Future prices are
+    spot * growth factor, so a factor is only looked up once per curve and maturity no matter how
+    many ask levels or books use it. The source is a TermStructure (misses are answered in one
+    vectorized call to its precomputed table) or a plain rate, continuously compounded.
+
+    max_size should cover the maturity grid in use, otherwise a dense grid evicts its own factors.
+    """
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self._factors = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, source, maturity_days):
+        return float(self.get_many(source, [maturity_days])[0])
+
+    def get_many(self, source, maturity_dates):
+        """
+        Growth factors of `source` for each maturity, as an array. All misses are computed together.
+        """
+        maturity_dates = maturity_dates.tolist() if isinstance(maturity_dates, np.ndarray) else list(maturity_dates)
+        factors = np.empty(len(maturity_dates))
+        missing = []
+        for index, maturity_days in enumerate(maturity_dates):
+            key = (source, maturity_days)
+            factor = self._factors.get(key)
+            if factor is None:
+                missing.append(index)
+            else:
+                self._factors.move_to_end(key)
+                factors[index] = factor
+        self.hits += len(maturity_dates) - len(missing)
+        if not missing:
+            return factors
+
+        self.misses += len(missing)
+        missing_days = [maturity_dates[index] for index in missing]
+        computed = self._compute(source, missing_days)
+        for index, maturity_days, factor in zip(missing, missing_days, computed.tolist()):
+            factors[index] = factor
+            self._factors[(source, maturity_days)] = factor
+        while len(self._factors) > self.max_size:
+            self._factors.popitem(last=False)  # Evict the least recently used factor
+        return factors
+
+    @staticmethod
+    def _compute(source, maturity_dates):
+        if isinstance(source, TermStructure):
+            return source.growth_factors(maturity_dates)
+        return growth_factors(source, maturity_dates)
+
+    def clear(self):
+        self._factors.clear()
+
+    def __len__(self):
+        return len(self._factors)
+
+    def stats(self):
+        return {
+            "size": len(self._factors),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+QUOTE_TABLE_HEADERS = ["Sell Price", "Maturity (Days)", "Future Price", "Amount", "Expected Earnings"]
+
+class QuoteTableRenderer:
+    """
+    Fast renderer for quote tables in the same layout as tabulate(..., tablefmt="pretty").
+
+    Column widths are kept between calls and only ever grow, so a row renders to the same line from
+    one frame to the next; formatted lines are cached by row values (up to cache_size rows) and
+    only rows not seen before are formatted. With fresh widths the output is identical to
+    tabulate's.
+    """
+
+    def __init__(self, headers=None, cache_size=4096):
+        self.headers = list(QUOTE_TABLE_HEADERS if headers is None else headers)
+        self.widths = [len(header) for header in self.headers]
+        self.cache_size = cache_size
+        self._lines = {}
+        self._frame = None
+
+    def _format(self, cells):
+        return "|" + "|".join(f" {cell:^{width}} " for cell, width in zip(cells, self.widths)) + "|"
+
+    def _update_frame(self):
+        separator = "+" + "+".join("-" * (width + 2) for width in self.widths) + "+"
+        self._frame = (separator, self._format(self.headers))
+        self._lines.clear()
+
+    def render(self, rows):
+        """
+        Renders the given rows (sequences of cell values, already ordered) as a table string.
+        """
+        rows = [tuple(row) for row in rows]
+
+        new_cells = {}
+        grew = self._frame is None
+        for row in rows:
+            if row in self._lines or row in new_cells:
+                continue
+            cells = new_cells[row] = [str(value) for value in row]
+            for i, cell in enumerate(cells):
+                if len(cell) > self.widths[i]:
+                    self.widths[i] = len(cell)
+                    grew = True
+
+        if grew:
+            self._update_frame()
+        if len(self._lines) + len(new_cells) > self.cache_size:
+            self._lines.clear()
+
+        lines = []
+        for row in rows:
+            line = self._lines.get(row)
+            if line is None:
+                cells = new_cells.get(row)
+                line = self._lines[row] = self._format(cells if cells is not None else [str(value) for value in row])
+            lines.append(line)
+
+        separator, header = self._frame
+        return "\n".join([separator, header, separator, *lines, separator])
 
 class MarketMaker:
+    """
+    Prices futures off the current order book and evaluates carry trades.
+
+    Future prices are spot * growth factor of the term structure. By default the term structure is
+    a continuously compounded FlatRate at base_rate; pass term_structure (a FlatRate, YieldCurve or
+    any term_structure.TermStructure) to use a curve or another compounding convention instead.
+
+    term_structure is the source of truth: base_rate is the rate of a FlatRate term structure and
+    None for any other curve, and setting base_rate installs a FlatRate at that rate with the
+    compounding convention and frequency of the current term structure.
+
+    Growth factors go through a GrowthFactorCache, cleared whenever the term structure or base
+    rate is replaced; growth_cache_info() reports its hit/miss counters.
+    """
     
-    def __init__(self, market_data_manager, base_rate=0.02, verbose=False):
+    def __init__(self, market_data_manager, base_rate=0.02, verbose=False, term_structure=None, growth_factor_cache_size=1024):
         self.market_data_manager = market_data_manager
-        self.base_rate = base_rate  # Base interest rate for carry trade calculations
+        self.growth_factor_cache = GrowthFactorCache(growth_factor_cache_size)
+        self.term_structure = term_structure if term_structure is not None else FlatRate(base_rate)
         self.verbose = VERBOSE
         self.logger = market_data_manager.logger
+        self.ranking = None
+        self.quote_table_renderer = QuoteTableRenderer()
+
+        if self.base_rate is not None:
+            self.logger.log("MarketMaker initialized with base rate: %s%%", self.base_rate * 100, verbose=self.verbose)
+        else:
+            self.logger.log("MarketMaker initialized with term structure: %s", self.term_structure, verbose=self.verbose)
+
+    @property
+    def term_structure(self):
+        return self._term_structure
+
+    @term_structure.setter
+    def term_structure(self, term_structure):
+        # Factors of the previous curve can no longer be hit, drop them instead of waiting for eviction
+        self._term_structure = term_structure
+        self.growth_factor_cache.clear()
 
-        self.logger.log(f"MarketMaker initialized with base rate: {self.base_rate * 100}%", verbose=self.verbose)
+    @property
+    def base_rate(self):
+        return self.term_structure.rate if isinstance(self.term_structure, FlatRate) else None
 
-    def carry_trade_strategy(self, N=5, maturity_dates=None):
+    @base_rate.setter
+    def base_rate(self, base_rate):
+        self.term_structure = FlatRate(base_rate, self.term_structure.compounding, self.term_structure.frequency)
+
+    def invalidate_growth_factors(self):
+        """
+        Clears the cached growth factors, e.g. after a term structure has been modified in place.
+        """
+        self.growth_factor_cache.clear()
+
+    def growth_cache_info(self):
+        """
+        Size, bound and hit/miss counters of the growth factor cache, counted whether or not
+        instrumentation is enabled.
+        """
+        return self.growth_factor_cache.stats()
+
+    def carry_trade_strategy(self, N=5, maturity_dates=None, columnar=False):
         """
         Implements the carry trade strategy for each sell order in the order book across N future contracts.
         Quote amounts are calculated based on all available liquidity, and the potential earnings are evaluated.
+
+        By default the quotes are returned as a list of dicts (one per ask level and maturity). Pass
+        columnar=True to get the underlying CarryTradeQuotes arrays instead.
+        """
+        quotes = self.carry_trade_matrix(N, maturity_dates)
+        if columnar:
+            return quotes
+        with STATS.timer("strategy.to_dicts"):
+            return quotes.to_dicts()
+
+    @STATS.timed("strategy.carry_trade_matrix")
+    def carry_trade_matrix(self, N=5, maturity_dates=None):
+        """
+        Batched engine behind carry_trade_strategy: computes the full ask x maturity earnings matrix
+        with a single broadcast and returns it as a CarryTradeQuotes instance.
         """
 
         if maturity_dates is None:
-            maturity_dates = [30, 60, 90, 180, 365]  # Default maturity dates in days
+            maturity_dates = DEFAULT_MATURITY_DATES
 
         self.logger.log("Starting carry trade strategy...", verbose=self.verbose)
-        self.logger.log(f"Using the following maturity dates: {maturity_dates[:N]} days", verbose=self.verbose)
+        self.logger.log("Using the following maturity dates: %s days", maturity_dates[:N], verbose=self.verbose)
+
+        maturities = np.asarray(maturity_dates[:N])
 
         order_book = self.market_data_manager.current_order_book
         if not order_book:
-            self.logger.log("No order book data available. Exiting strategy.", verbose=self.verbose)
+            self.logger.warning("No order book data available. Exiting strategy.", verbose=self.verbose)
+            return CarryTradeQuotes.empty(maturities)
+
+        sell_prices, amounts = ask_arrays(order_book)
+        if sell_prices.size == 0:
+            return CarryTradeQuotes.empty(maturities)
+
+        # Spot price is the lowest sell order, so the future price only depends on the maturity
+        future_prices = spot_price_from(sell_prices) * self._growth_factors(maturities)
+        expected_earnings = (future_prices[np.newaxis, :] - sell_prices[:, np.newaxis]) * amounts[:, np.newaxis]
+
+        STATS.count("quotes_produced", expected_earnings.size)
+        return CarryTradeQuotes(sell_prices, amounts, maturities, future_prices, expected_earnings)
+
+    @STATS.timed("strategy.rank_carry_trades")
+    def rank_carry_trades(self, N=5, maturity_dates=None):
+        """
+        Keeps the carry trade quotes ranked across order book deltas.
+
+        Only the ask levels changed since the last call are re-ranked; the ranking is rebuilt from
+        scratch when the spot price (best ask), the term structure, the maturities or the order book
+        itself change. Returns the CarryTradeRanking.
+        """
+        if maturity_dates is None:
+            maturity_dates = DEFAULT_MATURITY_DATES
+        maturity_dates = maturity_dates[:N]
+
+        order_book = self.market_data_manager.get_incremental_order_book()
+        changes = self.market_data_manager.pop_changed_levels()
+
+        best_ask = order_book.best_ask()
+        spot_price = best_ask["price"] if best_ask else None
+
+        if self.ranking is not None and self.ranking.is_valid_for(order_book, spot_price, self.term_structure, maturity_dates):
+            for change in changes:
+                if change["side"] == "ask":
+                    self.ranking.update_level(change["price"], change["amount"])
+            return self.ranking
+
+        self.logger.debug("Rebuilding carry trade ranking...", verbose=self.verbose)
+        future_prices = (spot_price * self._growth_factors(maturity_dates)).tolist() if best_ask else []
+        self.ranking = CarryTradeRanking(order_book, spot_price, self.term_structure, maturity_dates, future_prices)
+        self.ranking.rebuild(order_book.sides["ask"].levels())
+        return self.ranking
+
+    @STATS.timed("strategy.top_trades")
+    def top_trades(self, k=5, N=5, maturity_dates=None, max_amount=None):
+        """
+        Returns the k quotes with the highest expected earnings, best first, without materializing
+        and sorting every quote.
+
+        Asks are walked by ascending price (the ladder is sorted once if it is not already), so the
+        margin future_price - sell_price only shrinks while walking the book. With amounts bounded by
+        max_amount (the largest ask amount by default) the walk stops as soon as no remaining level
+        can beat the current k-th best quote.
+        """
+        if maturity_dates is None:
+            maturity_dates = DEFAULT_MATURITY_DATES
+        maturity_dates = maturity_dates[:N]
+
+        order_book = self.market_data_manager.current_order_book
+        if not order_book or k <= 0 or not maturity_dates:
+            return []
+        sell_prices, amounts = ask_arrays(order_book)
+        if sell_prices.size == 0:
             return []
 
-        sell_orders = order_book["ask"]
-        all_strategy_quotes = []
+        future_prices = (spot_price_from(sell_prices) * self._growth_factors(maturity_dates)).tolist()
+        if np.any(np.diff(sell_prices) < 0):
+            order = np.argsort(sell_prices, kind="stable")
+            sell_prices, amounts = sell_prices[order], amounts[order]
+
+        highest_future_price = max(future_prices)
+        if max_amount is None:
+            max_amount = amounts.max().item()
+
+        # Min-heap of the k best quotes; the negated sequence number keeps earlier quotes ahead on ties
+        heap = []
+        sequence = 0
+        for level in range(len(sell_prices)):
+            sell_price = sell_prices[level].item()
+            if len(heap) == k and max(highest_future_price - sell_price, 0) * max_amount <= heap[0][0]:
+                break
+
+            amount = amounts[level].item()
+            for maturity, future_price in zip(maturity_dates, future_prices):
+                entry = ((future_price - sell_price) * amount, -sequence, sell_price, maturity, future_price, amount)
+                sequence += 1
+                if len(heap) < k:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    heapq.heapreplace(heap, entry)
+
+        return [
+            carry_trade_quote(sell_price, maturity, future_price, amount, expected_earnings)
+            for expected_earnings, _, sell_price, maturity, future_price, amount in sorted(heap, reverse=True)
+        ]
+
+    def fill_simulator(self, N=5, maturity_dates=None):
+        """
+        Returns a FillSimulator for the current order book, to answer "what if I buy X" queries
+        across the first N maturities.
+        """
+        if maturity_dates is None:
+            maturity_dates = DEFAULT_MATURITY_DATES
+        maturities = np.asarray(maturity_dates[:N])
+
+        order_book = self.market_data_manager.current_order_book
+        if not order_book:
+            self.logger.warning("No order book data available. Cannot simulate fills.", verbose=self.verbose)
+            return FillSimulator(np.empty(0), np.empty(0), maturities, np.full(len(maturities), np.nan))
+
+        sell_prices, amounts = ask_arrays(order_book)
+        future_prices = spot_price_from(sell_prices) * self._growth_factors(maturities) if sell_prices.size else np.full(len(maturities), np.nan)
+        return FillSimulator(sell_prices, amounts, maturities, future_prices)
+
+    def sweep_carry_trades(self, rates, maturity_dates=None, workers=1, chunk_size=256):
+        """
+        Evaluates the carry trade strategy on the current order book for every base rate in `rates`
+        and every maturity in `maturity_dates` with a single broadcast, returning a CarryTradeSweep
+        with a (rate x maturity x level) earnings tensor. Each rate is applied as a flat rate with
+        the compounding convention of the MarketMaker's term structure, which is left untouched.
+
+        With workers > 1 the rates are split in chunks of chunk_size evaluated on a thread pool
+        (NumPy releases the GIL inside the array operations).
+        """
+        rates = np.atleast_1d(np.asarray(rates, dtype=float))
+        maturities = np.asarray(DEFAULT_MATURITY_DATES if maturity_dates is None else maturity_dates)
+
+        order_book = self.market_data_manager.current_order_book
+        if not order_book:
+            self.logger.warning("No order book data available. Exiting sweep.", verbose=self.verbose)
+            sell_prices, amounts = np.empty(0), np.empty(0)
+        else:
+            sell_prices, amounts = ask_arrays(order_book)
+
+        # Flat rates under the compounding convention of the current term structure
+        compounding, frequency = self.term_structure.compounding, self.term_structure.frequency
+        spot_price = spot_price_from(sell_prices) if sell_prices.size else np.nan
 
-        for sell_order in sell_orders:
-            sell_price = sell_order["price"]
-            amount = sell_order["amount"]
+        future_prices = np.full((len(rates), len(maturities)), np.nan)  # Stays NaN without a spot price
+        expected_earnings = np.empty((len(rates), len(maturities), len(sell_prices)))
 
-            for maturity in maturity_dates[:N]:
-                future_price = self.calculate_future_price(maturity)
+        def evaluate(start):
+            stop = start + chunk_size
+            if sell_prices.size:
+                factors = growth_factors(rates[start:stop, np.newaxis], maturities, compounding, frequency)
+                future_prices[start:stop] = spot_price * factors
+            np.multiply(future_prices[start:stop, :, np.newaxis] - sell_prices, amounts, out=expected_earnings[start:stop])
+
+        chunks = range(0, len(rates), chunk_size)
+        if workers > 1 and len(chunks) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(evaluate, chunks))
+        else:
+            for start in chunks:
+                evaluate(start)
 
-                if future_price is not None:
-                    expected_earnings = (future_price - sell_price) * amount
-                    all_strategy_quotes.append({
-                        "sell_price": sell_price,
-                        "maturity_days": maturity,
-                        "future_price": round(future_price, 2),
-                        "amount": amount,
-                        "expected_earnings": round(expected_earnings, 2)
-                    })
+        self.logger.debug("Swept %d base rates over %d maturities", len(rates), len(maturities), verbose=self.verbose)
+        return CarryTradeSweep(rates, maturities, sell_prices, amounts, future_prices, expected_earnings)
 
-        return all_strategy_quotes
+    def _growth_factors(self, maturity_dates):
+        """
+        Growth factors of the term structure for each maturity, as an array.
+        """
+        return self.growth_factor_cache.get_many(self.term_structure, maturity_dates)
 
     def calculate_future_price(self, maturity_days):
         """
-        Calculates the future price of the asset using the compound interest formula.
+        Calculates the future price of the asset from the spot price and the term structure's growth factor.
         """
         order_book = self.market_data_manager.current_order_book
 
         if not order_book:
-            self.logger.log("Order book data is missing. Cannot calculate future price", verbose=self.verbose)
+            self.logger.warning("Order book data is missing. Cannot calculate future price", verbose=self.verbose)
             return None
 
         # Use spot price from the lowest sell order
-        spot_price = order_book["ask"][0]["price"]
-        future_price = spot_price * math.exp(self.base_rate * (maturity_days / 365))
+        spot_price = spot_price_from(ask_arrays(order_book)[0])
+        future_price = spot_price * self.growth_factor_cache.get(self.term_structure, maturity_days)
         return future_price
 
-    def display_strategy_quotes(self, strategy_quotes):
+    def display_strategy_quotes(self, strategy_quotes, limit=None, offset=0):
         """
         Display the generated strategy quotes in a tabulated format for easier reading and comparison.
+
+        With a limit, only the page of `limit` rows starting at `offset` in the ranking is selected
+        (partial selection instead of a full sort) and formatted with the QuoteTableRenderer fast
+        path instead of tabulate.
         """
 
-        # Create a table with the details of each strategy quote
-        table_data = []
-        highest_earnings = float('-inf')
+        def table_row(quote):
+            return [quote["sell_price"], quote["maturity_days"], quote["future_price"], quote["amount"], quote["expected_earnings"]]
 
-        for quote in strategy_quotes:
-            if quote["expected_earnings"] > highest_earnings:
-                highest_earnings = quote["expected_earnings"]
+        if limit is None:
+            # Create a table with the details of each strategy quote
+            table_data = [table_row(quote) for quote in strategy_quotes]
 
-            table_data.append([
-                quote["sell_price"],
-                quote["maturity_days"],
-                quote["future_price"],
-                quote["amount"],
-                quote["expected_earnings"]
-            ])
+            # Sort the table data by expected earnings in descending order
+            with STATS.timer("strategy.sort_quotes"):
+                table_data = sorted(table_data, key=lambda x: x[4], reverse=True)
 
-        # Sort the table data by expected earnings in descending order
-        table_data = sorted(table_data, key=lambda x: x[4], reverse=True)
+            # Build the table using tabulate for better readability
+            from tabulate import tabulate  # Deferred, the client and headless runs use the fast path
+
+            with STATS.timer("format.tabulate"):
+                output = tabulate(table_data, headers=QUOTE_TABLE_HEADERS, tablefmt="pretty")
+        else:
+            # nlargest is stable like sorted, so the page matches the same rows of the full table
+            with STATS.timer("strategy.sort_quotes"):
+                table_data = [table_row(quote) for quote in heapq.nlargest(offset + limit, strategy_quotes, key=lambda x: x["expected_earnings"])]
 
-        # Build the table using tabulate for better readability
-        headers = ["Sell Price", "Maturity (Days)", "Future Price", "Amount", "Expected Earnings"]
-        output = tabulate(table_data, headers=headers, tablefmt="pretty")
+            with STATS.timer("format.quote_table"):
+                output = self.quote_table_renderer.render(table_data[offset:])
 
         self.logger.log("Summary of Strategy Quotes:", verbose=True)
-        best_quote = max(strategy_quotes, key=lambda x: x["expected_earnings"], default=None)
-        if best_quote:
-            self.logger.log(f"Base rate used for calculation: {float(self.base_rate) * 100} %", verbose=True)
-            self.logger.log(f"Best potential trade: Sell at {best_quote['sell_price']} with maturity in {best_quote['maturity_days']} days", verbose=True)
-            self.logger.log(f"Expected earnings: {best_quote['expected_earnings']} units", verbose=True)
+        if table_data:
+            # The sort is stable, so the first row is the best quote in the original order
+            best_sell_price, best_maturity, _, _, best_earnings = table_data[0]
+            if self.base_rate is not None:
+                self.logger.log("Base rate used for calculation: %s %% (%s compounding)", float(self.base_rate) * 100, self.term_structure.compounding, verbose=True)
+            else:
+                self.logger.log("Term structure used for calculation: %s", self.term_structure, verbose=True)
+            self.logger.log("Best potential trade: Sell at %s with maturity in %s days", best_sell_price, best_maturity, verbose=True)
+            self.logger.log("Expected earnings: %s units", best_earnings, verbose=True)
         else:
             self.logger.log("No profitable trades found", verbose=True)
 
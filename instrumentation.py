@@ -0,0 +1,203 @@
+import cProfile
+import functools
+import io
+import math
+import pstats
+import threading
+import time
+
+HISTOGRAM_BUCKETS = 32  # Bucket i counts durations in [2**(i-1), 2**i) microseconds
+
+class _NullTimer:
+    """
+    Shared do-nothing context manager handed out while instrumentation is disabled.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+class _Timer:
+
+    __slots__ = ("stats", "name", "start")
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stats.record(self.name, time.perf_counter() - self.start)
+        return False
+
+class TimerHistogram:
+    """
+    Duration statistics of one timer: count, total, min, max and a log2 histogram of microseconds.
+    """
+
+    __slots__ = ("count", "total", "min", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.buckets = [0] * HISTOGRAM_BUCKETS
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        bucket = min(max(int(seconds * 1e6), 0).bit_length(), HISTOGRAM_BUCKETS - 1)
+        self.buckets[bucket] += 1
+
+    def percentile(self, q):
+        """
+        Approximate percentile in seconds, interpolated linearly inside the histogram bucket that
+        holds it and clamped to the recorded min / max.
+        """
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            if count and seen + count >= rank:
+                lower = (1 << (bucket - 1)) if bucket else 0
+                upper = 1 << bucket
+                value = (lower + (rank - seen) / count * (upper - lower)) / 1e6
+                return min(max(value, self.min), self.max)
+            seen += count
+        return self.max
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "histogram_us": {f"<{1 << bucket}": count for bucket, count in enumerate(self.buckets) if count},
+        }
+
+class Stats:
+    """
+    Registry of per-stage timers and counters.
+
+    Instrumentation is off by default: timer() then returns a shared no-op context manager and
+    count() returns immediately, so instrumented hot paths only pay an attribute check. Enable it
+    with enable() and read everything with snapshot().
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._timers = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._profiler = None
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._timers = {}
+            self._counters = {}
+
+    def timer(self, name):
+        """
+        Context manager timing the enclosed block under `name`.
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def timed(self, name):
+        """
+        Decorator timing every call of the function under `name`.
+        """
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                with _Timer(self, name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record(self, name, seconds):
+        with self._lock:
+            histogram = self._timers.get(name)
+            if histogram is None:
+                histogram = self._timers[name] = TimerHistogram()
+            histogram.add(seconds)
+
+    def count(self, name, value=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def snapshot(self):
+        """
+        Returns {"timers": {name: stats}, "counters": {name: value}}; durations are in seconds.
+        """
+        with self._lock:
+            return {
+                "timers": {name: histogram.snapshot() for name, histogram in self._timers.items()},
+                "counters": dict(self._counters),
+            }
+
+    def format_snapshot(self):
+        snapshot = self.snapshot()
+        lines = []
+        for name, timer in sorted(snapshot["timers"].items()):
+            lines.append(
+                f"{name:<28} n={timer['count']:<8} mean={timer['mean'] * 1e6:10.1f}us "
+                f"p50={timer['p50'] * 1e6:10.1f}us p99={timer['p99'] * 1e6:10.1f}us max={timer['max'] * 1e6:10.1f}us"
+            )
+        for name, value in sorted(snapshot["counters"].items()):
+            lines.append(f"{name:<28} {value}")
+        return "\n".join(lines)
+
+    @property
+    def profiling(self):
+        return self._profiler is not None
+
+    def start_profile(self):
+        """
+        Starts an on-demand cProfile capture of the calling thread.
+        """
+        if self._profiler is None:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def stop_profile(self, sort_by="cumulative", limit=30):
+        """
+        Stops the capture started by start_profile and returns the pstats report as a string.
+        """
+        if self._profiler is None:
+            return ""
+        self._profiler.disable()
+        output = io.StringIO()
+        pstats.Stats(self._profiler, stream=output).sort_stats(sort_by).print_stats(limit)
+        self._profiler = None
+        return output.getvalue()
+
+STATS = Stats()
@@ -1,13 +1,16 @@
-import os
+import sys
+import argparse
+
 from components import MarketDataManager, MarketMaker, OrderBookGenerator
-from copy import deepcopy
 
 VERBOSE = True
 
-base_rate = float(input("\nPlease enter the base rate for the MarketMaker instance (e.g., 0.03 for 3%): ") or 0.03)
-visual_mode = input("Do you want to run the simulator in visual mode? (y/n): ").strip().lower()
+DEFAULT_BASE_RATE = 0.03
 
-if visual_mode == 'n':
+def run_text(base_rate):
+    """
+    Non-visual mode: generates one order book and prints it with the carry trade quotes.
+    """
 
     # Initialize components
     order_book_generator = OrderBookGenerator(asset_name="SYMBOL")
@@ -26,6 +29,68 @@ if visual_mode == 'n':
     trades_table = market_maker.display_strategy_quotes(carry_trade_quotes)
     print(trades_table)
 
-else:
-    
-    os.system(f"python client.py --base_rate {base_rate}")
\ No newline at end of file
+def run_headless(base_rate, ticks, tick_rate=0):
+    """
+    Headless mode: runs the tick simulator for `ticks` ticks and prints its report.
+    """
+    from simulation import TickSimulator, format_tick_report
+
+    order_book_generator = OrderBookGenerator(asset_name="SYMBOL")
+    market_data_manager = MarketDataManager(order_book_generator=order_book_generator)
+    market_maker = MarketMaker(market_data_manager=market_data_manager, base_rate=base_rate)
+
+    simulator = TickSimulator(market_maker, tick_rate=tick_rate)
+    print(format_tick_report(simulator.run(ticks=ticks)))
+
+def run_visual(base_rate, splash=True, stats=False):
+    """
+    Visual mode: runs the curses client in this process.
+    """
+    import client  # Deferred, curses is only needed in visual mode
+
+    client.run(base_rate, splash_seconds=client.SPLASH_SECONDS if splash else 0, stats=stats)
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description='Market Simulator')
+    parser.add_argument('--base-rate', '--base_rate', type=float, help=f'Base rate for the MarketMaker instance (default: {DEFAULT_BASE_RATE})')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--visual', action='store_true', help='Run the curses client')
+    mode.add_argument('--text', action='store_true', help='Print one order book and its carry trades')
+    mode.add_argument('--headless', action='store_true', help='Run the tick simulator without any display')
+    parser.add_argument('--ticks', type=int, default=10000, help='Number of ticks to simulate in headless mode (default: 10000)')
+    parser.add_argument('--tick-rate', type=float, default=0, help='Target ticks per second in headless mode, 0 for as fast as possible (default: 0)')
+    parser.add_argument('--no-splash', action='store_true', help='Start the visual client without showing the key bindings first')
+    parser.add_argument('--stats', action='store_true', help='Collect per-stage timings and print them on exit')
+    args = parser.parse_args(argv)
+
+    # Only ask for what is missing from the command line, and never when stdin is not a terminal
+    interactive = sys.stdin.isatty()
+
+    base_rate = args.base_rate
+    if base_rate is None:
+        base_rate = DEFAULT_BASE_RATE
+        if interactive:
+            base_rate = float(input("\nPlease enter the base rate for the MarketMaker instance (e.g., 0.03 for 3%): ") or DEFAULT_BASE_RATE)
+
+    if not (args.visual or args.text or args.headless):
+        visual_mode = input("Do you want to run the simulator in visual mode? (y/n): ").strip().lower() if interactive else 'n'
+        args.visual = visual_mode != 'n'
+        args.text = not args.visual
+
+    if args.stats and not args.visual:
+        from instrumentation import STATS
+        STATS.enable()
+
+    if args.visual:
+        run_visual(base_rate, splash=not args.no_splash, stats=args.stats)
+    elif args.headless:
+        run_headless(base_rate, args.ticks, args.tick_rate)
+    else:
+        run_text(base_rate)
+
+    if args.stats and not args.visual:
+        print(STATS.format_snapshot())
+
+if __name__ == "__main__":
+    main()
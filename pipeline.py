@@ -0,0 +1,171 @@
+import asyncio
+import inspect
+import json
+
+from components import OrderBook
+
+class CoalescingQueue:
+    """
+    Bounded, latest-wins channel between a book producer and one consumer.
+
+    It holds at most one pending item: putting a new book replaces the one the consumer has not
+    picked up yet, so a slow consumer always works on the latest snapshot and never accumulates a
+    backlog. The producer never blocks. Replaced items are counted in `coalesced`.
+    """
+
+    def __init__(self):
+        self._item = None
+        self._pending = False
+        self._closed = False
+        self._ready = asyncio.Event()
+        self.coalesced = 0
+
+    def put(self, item):
+        if self._pending:
+            self.coalesced += 1
+        self._item = item
+        self._pending = True
+        self._ready.set()
+
+    def close(self):
+        """
+        Ends the stream once the pending item (if any) has been consumed.
+        """
+        self._closed = True
+        self._ready.set()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._pending:
+            if self._closed:
+                raise StopAsyncIteration
+            self._ready.clear()
+            await self._ready.wait()
+
+        item = self._item
+        self._item = None
+        self._pending = False
+        return item
+
+async def generator_source(market_data_manager, count=None, interval=0.0, incremental=False, **kwargs):
+    """
+    Book source backed by a MarketDataManager: yields a new order book every `interval` seconds,
+    either regenerated (update_order_book) or moved by random deltas (stream_order_book).
+    """
+    produced = 0
+    while count is None or produced < count:
+        if incremental:
+            market_data_manager.stream_order_book(**kwargs)
+        else:
+            market_data_manager.update_order_book(**kwargs)
+        yield market_data_manager.current_order_book
+        produced += 1
+        await asyncio.sleep(interval)
+
+async def replay_source(path, interval=0.0):
+    """
+    Book source replaying a file with one JSON {"bid": [...], "ask": [...]} order book per line.
+    """
+    with open(path) as replay_file:
+        for line in replay_file:
+            if line.strip():
+                yield OrderBook.from_dict(json.loads(line))
+                await asyncio.sleep(interval)
+
+async def socket_source(host, port):
+    """
+    Book source reading JSON lines from a TCP feed, e.g. the local stand-in started by serve_feed.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while line := await reader.readline():
+            yield OrderBook.from_dict(json.loads(line))
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+async def serve_feed(source, host="127.0.0.1", port=0):
+    """
+    Local stand-in for an exchange feed: streams the books of `source` as JSON lines to the first
+    client that connects, then closes the connection. Returns the asyncio server; its bound port
+    is server.sockets[0].getsockname()[1].
+    """
+    async def stream(reader, writer):
+        async for order_book in source:
+            writer.write((json.dumps(OrderBook.from_dict(order_book).to_dict()) + "\n").encode())
+            await writer.drain()
+        writer.close()
+        await writer.wait_closed()
+
+    return await asyncio.start_server(stream, host, port)
+
+class StrategyConsumer:
+    """
+    Pipeline consumer running the carry trade strategy on each book it receives and handing the
+    top trades to its sinks. A sink is any callable (or coroutine function) taking (tick, trades).
+    """
+
+    def __init__(self, market_maker, sinks=(), N=5, maturity_dates=None, top_k=5):
+        self.market_maker = market_maker
+        self.sinks = list(sinks)
+        self.N = N
+        self.maturity_dates = maturity_dates
+        self.top_k = top_k
+        self.processed = 0
+        self.last_tick = None
+
+    async def consume(self, channel):
+        async for tick, order_book in channel:
+            self.market_maker.market_data_manager.current_order_book = order_book
+            trades = self.market_maker.top_trades(self.top_k, self.N, self.maturity_dates)
+            self.processed += 1
+            self.last_tick = tick
+
+            for sink in self.sinks:
+                result = sink(tick, trades)
+                if inspect.isawaitable(result):
+                    await result
+
+            # Strategy evaluation is synchronous, give the producer a chance to publish newer books
+            await asyncio.sleep(0)
+
+class BookPipeline:
+    """
+    Pushes books from an async source to one or more strategy consumers.
+
+    Each consumer reads from its own CoalescingQueue, so a slow consumer skips stale snapshots
+    instead of slowing down the source or the other consumers.
+    """
+
+    def __init__(self, source, consumers):
+        self.source = source
+        self.consumers = list(consumers)
+        self.produced = 0
+
+    async def run(self):
+        """
+        Runs until the source is exhausted and every consumer has drained its channel. Returns a
+        stats dict with the number of books produced, processed and coalesced per consumer.
+        """
+        channels = [CoalescingQueue() for _ in self.consumers]
+        tasks = [asyncio.create_task(consumer.consume(channel)) for consumer, channel in zip(self.consumers, channels)]
+
+        try:
+            async for order_book in self.source:
+                for channel in channels:
+                    channel.put((self.produced, order_book))
+                self.produced += 1
+        finally:
+            for channel in channels:
+                channel.close()
+        await asyncio.gather(*tasks)
+
+        return {
+            "produced": self.produced,
+            "consumers": [
+                {"processed": consumer.processed, "coalesced": channel.coalesced, "last_tick": consumer.last_tick}
+                for consumer, channel in zip(self.consumers, channels)
+            ]
+        }
@@ -0,0 +1,157 @@
+import time
+
+import numpy as np
+
+from components import OrderBook
+
+MAGIC = b"OBREC\x00\x00\x01"
+HEADER_DTYPE = np.dtype([("magic", "S8"), ("record_size", "<u8")])
+
+BID = 0
+ASK = 1
+
+# One fixed-width record per order book level. Levels of a tick are written together, bids then
+# asks, each side best level first, so a tick is a contiguous run of records.
+RECORD_DTYPE = np.dtype([
+    ("tick", "<u8"),
+    ("timestamp", "<f8"),
+    ("side", "u1"),
+    ("price", "<f8"),
+    ("amount", "<i8"),
+])
+
+class BookRecorder:
+    """
+    Appends order books to a compact binary file of fixed-width level records.
+
+    Attach it to a MarketDataManager (market_data_manager.recorder = recorder) to capture every
+    book the manager produces, or call record() directly.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.tick = 0
+        self._file = open(path, "wb")
+        self._file.write(np.array([(MAGIC, RECORD_DTYPE.itemsize)], dtype=HEADER_DTYPE).tobytes())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def record(self, order_book, timestamp=None):
+        order_book = OrderBook.from_dict(order_book)
+        num_bids = len(order_book.bid_prices)
+
+        records = np.empty(num_bids + len(order_book.ask_prices), dtype=RECORD_DTYPE)
+        records["tick"] = self.tick
+        records["timestamp"] = time.time() if timestamp is None else timestamp
+        records["side"][:num_bids] = BID
+        records["side"][num_bids:] = ASK
+        records["price"][:num_bids] = order_book.bid_prices
+        records["price"][num_bids:] = order_book.ask_prices
+        records["amount"][:num_bids] = order_book.bid_amounts
+        records["amount"][num_bids:] = order_book.ask_amounts
+
+        self._file.write(records.tobytes())
+        self.tick += 1
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+class BookReplay:
+    """
+    Memory-mapped replay of a BookRecorder file.
+
+    Nothing is parsed or loaded up front: iteration walks the file in chunks of chunk_size
+    records, and order_book(tick) binary-searches the tick column, so only the pages holding the
+    requested levels are read from disk. Ticks whose book had no levels are not stored.
+    """
+
+    def __init__(self, path, chunk_size=65536):
+        header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+        if header.size == 0 or header[0]["magic"] != MAGIC or header[0]["record_size"] != RECORD_DTYPE.itemsize:
+            raise ValueError(f"{path} is not an order book recording")
+
+        self.path = path
+        self.chunk_size = chunk_size
+        self.records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER_DTYPE.itemsize)
+
+    def __len__(self):
+        """
+        Number of recorded ticks (including ticks with empty books).
+        """
+        if len(self.records) == 0:
+            return 0
+        return int(self.records[-1]["tick"]) + 1
+
+    def _first_record(self, tick, low=0):
+        # Binary search on the memory-mapped tick column, touching O(log n) records
+        high = len(self.records)
+        while low < high:
+            middle = (low + high) // 2
+            if self.records[middle]["tick"] < tick:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    @staticmethod
+    def _order_book(records):
+        num_bids = int(np.count_nonzero(records["side"] == BID))
+        return OrderBook(
+            records["price"][:num_bids],
+            records["amount"][:num_bids],
+            records["price"][num_bids:],
+            records["amount"][num_bids:]
+        )
+
+    def order_book(self, tick):
+        """
+        Returns the OrderBook recorded at `tick`.
+        """
+        start = self._first_record(tick)
+        end = self._first_record(tick + 1, low=start)
+        return self._order_book(self.records[start:end])
+
+    def __iter__(self):
+        """
+        Yields (tick, timestamp, order_book) for every recorded tick, in order.
+        """
+        records = self.records
+        start = 0
+        chunk_size = self.chunk_size
+        while start < len(records):
+            chunk = records[start:start + chunk_size]
+            ticks = chunk["tick"]
+            breaks = np.flatnonzero(ticks[1:] != ticks[:-1]) + 1
+
+            last_chunk = start + len(chunk) >= len(records)
+            if not last_chunk and breaks.size == 0:
+                chunk_size *= 2  # A single tick fills the chunk, read further ahead
+                continue
+
+            # The last tick of a chunk may continue in the next one, so it is left for the next read
+            end = len(chunk) if last_chunk else int(breaks[-1])
+            bounds = [0] + [int(b) for b in breaks if b < end] + [end]
+            for group_start, group_end in zip(bounds[:-1], bounds[1:]):
+                group = chunk[group_start:group_end]
+                yield int(group[0]["tick"]), float(group[0]["timestamp"]), self._order_book(group)
+
+            start += end
+            chunk_size = self.chunk_size
+
+    def replay(self, market_maker, N=5, maturity_dates=None):
+        """
+        Replays every recorded book through the carry trade strategy, yielding
+        (tick, CarryTradeQuotes) pairs.
+        """
+        market_data_manager = market_maker.market_data_manager
+        for tick, _, order_book in self:
+            market_data_manager.current_order_book = order_book
+            yield tick, market_maker.carry_trade_matrix(N, maturity_dates)
@@ -0,0 +1,219 @@
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+
+import numpy as np
+
+from components import OrderBookGenerator, MarketDataManager, MarketMaker, Logger
+from instrumentation import STATS
+
+def _evaluate_shard(shard, N, maturity_dates, top_k):
+    """
+    Worker entry point: evaluates the carry trade strategy for a shard of (symbol, order_book,
+    term_structure) jobs and returns the best quotes of each symbol, tagged with the symbol.
+    """
+    quotes = []
+    for symbol, order_book, term_structure in shard:
+        market_data_manager = MarketDataManager(OrderBookGenerator(asset_name=symbol))
+        market_data_manager.current_order_book = order_book
+        market_maker = MarketMaker(market_data_manager, term_structure=term_structure)
+
+        carry_trade_quotes = market_maker.carry_trade_matrix(N, maturity_dates)
+        symbol_quotes = carry_trade_quotes.to_dicts() if top_k is None else carry_trade_quotes.top(top_k)
+        for quote in symbol_quotes:
+            quote["symbol"] = symbol
+        quotes.extend(symbol_quotes)
+    return quotes
+
+class MultiAssetSimulator:
+    """
+    Runs one OrderBookGenerator / MarketDataManager / MarketMaker triple per symbol and evaluates
+    the carry trade strategy across all of them.
+
+    Evaluation is sharded by symbol over a process pool so it scales with the number of cores; with
+    processes=1 everything runs in the calling process. The pool is created on first use and kept
+    until close() is called.
+    """
+
+    def __init__(self, symbols, base_rate=0.02, processes=None, logger=None):
+        self.logger = logger if logger is not None else Logger()
+        self.processes = processes or os.cpu_count() or 1
+        self.markets = {}
+        for symbol in symbols:
+            order_book_generator = OrderBookGenerator(asset_name=symbol)
+            market_data_manager = MarketDataManager(order_book_generator, logger=self.logger)
+            self.markets[symbol] = MarketMaker(market_data_manager, base_rate=base_rate)
+        self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def update_order_books(self, **kwargs):
+        """
+        Generates a new order book for every symbol, forwarding kwargs to update_order_book.
+        """
+        for market_maker in self.markets.values():
+            market_maker.market_data_manager.update_order_book(**kwargs)
+
+    def _shards(self, num_shards):
+        jobs = [
+            (symbol, market_maker.market_data_manager.current_order_book, market_maker.term_structure)
+            for symbol, market_maker in self.markets.items()
+            if market_maker.market_data_manager.current_order_book
+        ]
+        shard_size = max(1, -(-len(jobs) // num_shards))
+        return [jobs[i:i + shard_size] for i in range(0, len(jobs), shard_size)]
+
+    def evaluate(self, N=5, maturity_dates=None, top_k=10):
+        """
+        Evaluates the carry trade strategy for every symbol and returns one cross-asset ranking.
+
+        Each symbol contributes its top_k quotes (all quotes if top_k is None); the result is a list
+        of quote dicts with an extra "symbol" key, sorted by expected earnings in descending order.
+        """
+        if self.processes == 1:
+            results = [_evaluate_shard(shard, N, maturity_dates, top_k) for shard in self._shards(1)]
+        else:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.processes)
+            # A few shards per worker keeps the pool balanced when symbols have different book depths
+            shards = self._shards(self.processes * 4)
+            futures = [self._executor.submit(_evaluate_shard, shard, N, maturity_dates, top_k) for shard in shards]
+            results = [future.result() for future in futures]
+
+        ranking = sorted(chain.from_iterable(results), key=lambda x: x["expected_earnings"], reverse=True)
+        self.logger.log("Evaluated carry trades for %d assets", len(self.markets))
+        return ranking
+
+class TickSimulator:
+    """
+    Headless, tick-driven market simulation.
+
+    Every tick updates the order book and evaluates the carry trade strategy, paced to tick_rate
+    ticks per second. In incremental mode the book moves by num_changes random deltas per tick and
+    the ranking is maintained with rank_carry_trades; otherwise the book is regenerated and the
+    batched engine recomputes every quote.
+
+    When evaluation falls behind schedule the missed ticks are coalesced instead of queued: their
+    book updates are applied together and the strategy runs once, so the loop never builds up a
+    backlog. Skipped ticks are counted in the report.
+    """
+
+    def __init__(self, market_maker, tick_rate=1000, N=5, maturity_dates=None, incremental=True, num_changes=3, book_depth=15):
+        self.market_maker = market_maker
+        self.market_data_manager = market_maker.market_data_manager
+        self.tick_rate = tick_rate
+        self.N = N
+        self.maturity_dates = maturity_dates
+        self.incremental = incremental
+        self.num_changes = num_changes
+        self.book_depth = book_depth
+
+    def _update_order_book(self, ticks):
+        if self.incremental:
+            self.market_data_manager.stream_order_book(num_changes=self.num_changes * ticks)
+        else:
+            self.market_data_manager.update_order_book(max_ask_items=self.book_depth, max_bid_items=self.book_depth)
+
+    def _evaluate_strategy(self):
+        if self.incremental:
+            return self.market_maker.rank_carry_trades(self.N, self.maturity_dates)
+        return self.market_maker.carry_trade_matrix(self.N, self.maturity_dates)
+
+    def run(self, ticks=None, duration=None):
+        """
+        Runs until `ticks` scheduled ticks have elapsed or `duration` seconds have passed (whichever
+        comes first) and returns the report dict.
+        """
+        if ticks is None and duration is None:
+            raise ValueError("Either ticks or duration must be given")
+        if self.market_data_manager.current_order_book is None:
+            self.market_data_manager.update_order_book(max_ask_items=self.book_depth, max_bid_items=self.book_depth)
+
+        period = 1 / self.tick_rate if self.tick_rate else 0
+        latencies = []
+        skipped_ticks = 0
+        tick = 0
+
+        start = time.perf_counter()
+        end = start + duration if duration is not None else float("inf")
+        while ticks is None or tick < ticks:
+            now = time.perf_counter()
+            if now >= end:
+                break
+
+            deadline = start + tick * period
+            if now < deadline:
+                time.sleep(deadline - now)
+                now = time.perf_counter()
+
+            # Coalesce every tick whose deadline has already passed into this one
+            due_ticks = int((now - start) / period) + 1 - tick if period else 1
+            due_ticks = max(1, due_ticks if ticks is None else min(due_ticks, ticks - tick))
+
+            tick_start = time.perf_counter()
+            self._update_order_book(due_ticks)
+            self._evaluate_strategy()
+            latencies.append(time.perf_counter() - tick_start)
+
+            skipped_ticks += due_ticks - 1
+            tick += due_ticks
+
+        return self.report(latencies, skipped_ticks, time.perf_counter() - start)
+
+    def report(self, latencies, skipped_ticks, elapsed):
+        latencies = np.asarray(latencies) * 1e6  # Microseconds
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) if latencies.size else (0.0, 0.0, 0.0)
+        return {
+            "target_tick_rate": self.tick_rate,
+            "evaluated_ticks": int(latencies.size),
+            "skipped_ticks": skipped_ticks,
+            "elapsed_seconds": elapsed,
+            "achieved_tick_rate": latencies.size / elapsed if elapsed else 0.0,
+            "latency_p50_us": float(p50),
+            "latency_p90_us": float(p90),
+            "latency_p99_us": float(p99),
+            "latency_max_us": float(latencies.max()) if latencies.size else 0.0,
+        }
+
+def format_tick_report(report):
+    return "\n".join([
+        f"Target tick rate:   {report['target_tick_rate']} ticks/s",
+        f"Achieved tick rate: {report['achieved_tick_rate']:.1f} ticks/s",
+        f"Evaluated ticks:    {report['evaluated_ticks']} ({report['skipped_ticks']} coalesced)",
+        f"Tick latency (us):  p50 {report['latency_p50_us']:.1f} | p90 {report['latency_p90_us']:.1f} | "
+        f"p99 {report['latency_p99_us']:.1f} | max {report['latency_max_us']:.1f}",
+    ])
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Headless Market Simulator')
+    parser.add_argument('--base_rate', type=float, default=0.03, help='Base rate for the MarketMaker instance (default: 0.03)')
+    parser.add_argument('--tick_rate', type=float, default=1000, help='Target ticks per second, 0 for as fast as possible (default: 1000)')
+    parser.add_argument('--ticks', type=int, default=10000, help='Number of ticks to simulate (default: 10000)')
+    parser.add_argument('--full', action='store_true', help='Regenerate the whole order book on every tick instead of applying deltas')
+    parser.add_argument('--stats', action='store_true', help='Collect per-stage timings and print them after the run')
+    args = parser.parse_args()
+
+    if args.stats:
+        STATS.enable()
+
+    order_book_generator = OrderBookGenerator(asset_name="SYMBOL")
+    market_data_manager = MarketDataManager(order_book_generator=order_book_generator)
+    market_maker = MarketMaker(market_data_manager=market_data_manager, base_rate=args.base_rate)
+
+    simulator = TickSimulator(market_maker, tick_rate=args.tick_rate, incremental=not args.full)
+    print(format_tick_report(simulator.run(ticks=args.ticks)))
+
+    if args.stats:
+        print(STATS.format_snapshot())
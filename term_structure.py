@@ -0,0 +1,135 @@
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from instrumentation import STATS
+
+SIMPLE = "simple"
+COMPOUND = "compound"
+CONTINUOUS = "continuous"
+COMPOUNDING = (SIMPLE, COMPOUND, CONTINUOUS)
+
+DAYS_PER_YEAR = 365
+DEFAULT_TABLE_DAYS = 730  # Daily lookup table size, longer maturities are computed directly
+
+def growth_factors(rates, days, compounding=CONTINUOUS, frequency=1):
+    """
+    Growth factors of annual `rates` over `days` days under the given compounding convention:
+    1 + r t (simple), (1 + r / frequency) ** (frequency t) (compound) or exp(r t) (continuous),
+    with t in years. Works element-wise on arrays.
+    """
+    rates = np.asarray(rates, dtype=float)
+    years = np.asarray(days, dtype=float) / DAYS_PER_YEAR
+    if compounding == CONTINUOUS:
+        return np.exp(rates * years)
+    if compounding == COMPOUND:
+        return (1 + rates / frequency) ** (frequency * years)
+    if compounding == SIMPLE:
+        return 1 + rates * years
+    raise ValueError(f"Unknown compounding: {compounding}")
+
+class TermStructure(ABC):
+    """
+    Base class of the interest rate term structures used to price futures: maps a maturity in days
+    to a zero rate and the matching growth and discount factors.
+
+    Subclasses implement rates(days). The growth and discount factors of every day from 0 to
+    table_days are precomputed on construction, and growth_factors() / discount_factors() answer a
+    whole vector of maturities with one np.interp over the table (exact on whole days), so the
+    per-tick cost stays a single vectorized lookup even for dense daily maturity grids.
+    Maturities past the end of the table are computed directly. With instrumentation enabled,
+    lookups are counted per maturity as term_structure.table_hits and term_structure.computed.
+    """
+
+    def __init__(self, compounding=CONTINUOUS, frequency=1, table_days=DEFAULT_TABLE_DAYS):
+        if compounding not in COMPOUNDING:
+            raise ValueError(f"Unknown compounding: {compounding}")
+        self.compounding = compounding
+        self.frequency = frequency
+
+        self.table_days = np.arange(table_days + 1, dtype=float)
+        self.growth_table = self._compute_growth_factors(self.table_days)
+        self.discount_table = 1 / self.growth_table
+
+    @abstractmethod
+    def rates(self, days):
+        """
+        Zero rates (annual) for an array of maturities in days.
+        """
+
+    def _compute_growth_factors(self, days):
+        return growth_factors(self.rates(days), days, self.compounding, self.frequency)
+
+    def _lookup(self, days, table):
+        days = np.atleast_1d(np.asarray(days, dtype=float))
+        factors = np.interp(days, self.table_days, table)
+        beyond = days > self.table_days[-1]
+        computed = int(np.count_nonzero(beyond))
+        if computed:
+            growth = self._compute_growth_factors(days[beyond])
+            factors[beyond] = growth if table is self.growth_table else 1 / growth
+        STATS.count("term_structure.table_hits", days.size - computed)
+        STATS.count("term_structure.computed", computed)
+        return factors
+
+    def growth_factors(self, days):
+        """
+        Growth factors for an array of maturities in days, as an array.
+        """
+        return self._lookup(days, self.growth_table)
+
+    def discount_factors(self, days):
+        """
+        Discount factors for an array of maturities in days, as an array.
+        """
+        return self._lookup(days, self.discount_table)
+
+    def growth_factor(self, days):
+        return float(self.growth_factors(days)[0])
+
+    def discount_factor(self, days):
+        return float(self.discount_factors(days)[0])
+
+class FlatRate(TermStructure):
+    """
+    Same rate for every maturity; with continuous compounding this is the historical base rate model.
+    """
+
+    def __init__(self, rate, compounding=CONTINUOUS, frequency=1, table_days=DEFAULT_TABLE_DAYS):
+        self.rate = rate
+        super().__init__(compounding, frequency, table_days)
+
+    def rates(self, days):
+        return np.full(np.shape(days), self.rate, dtype=float)
+
+    def __repr__(self):
+        return f"FlatRate({self.rate}, {self.compounding})"
+
+class YieldCurve(TermStructure):
+    """
+    Piecewise-linear zero rate curve through (tenor_days, rates) points, flat beyond the first
+    and last tenor.
+    """
+
+    def __init__(self, tenor_days, rates, compounding=CONTINUOUS, frequency=1, table_days=DEFAULT_TABLE_DAYS):
+        self.tenor_days = np.asarray(tenor_days, dtype=float)
+        self.tenor_rates = np.asarray(rates, dtype=float)
+        if self.tenor_days.ndim != 1 or self.tenor_days.size == 0 or self.tenor_days.shape != self.tenor_rates.shape:
+            raise ValueError("A yield curve needs one rate per tenor")
+        if np.any(np.diff(self.tenor_days) <= 0):
+            raise ValueError("Yield curve tenors must be strictly increasing")
+        super().__init__(compounding, frequency, max(table_days, int(np.ceil(self.tenor_days[-1]))))
+
+    @classmethod
+    def from_rates(cls, rates_by_maturity, **kwargs):
+        """
+        Builds a curve from per-maturity rates, e.g. {30: 0.031, 90: 0.034, 365: 0.04}.
+        """
+        tenor_days = sorted(rates_by_maturity)
+        return cls(tenor_days, [rates_by_maturity[days] for days in tenor_days], **kwargs)
+
+    def rates(self, days):
+        return np.interp(days, self.tenor_days, self.tenor_rates)
+
+    def __repr__(self):
+        return f"YieldCurve({len(self.tenor_days)} tenors, {self.compounding})"
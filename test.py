@@ -1,5 +1,18 @@
+import asyncio
+import math
+import subprocess
+import sys
+
+import numpy as np
 import pytest
-from components import OrderBookGenerator, MarketDataManager, MarketMaker
+from components import OrderBookGenerator, MarketDataManager, MarketMaker, IncrementalOrderBook, GrowthFactorCache, OrderBook, Logger, INFO, QuoteTableRenderer
+from simulation import MultiAssetSimulator, TickSimulator
+from pipeline import BookPipeline, StrategyConsumer, generator_source, serve_feed, socket_source
+from recording import BookRecorder, BookReplay
+from backtest import Backtest
+from instrumentation import Stats, STATS
+from term_structure import TermStructure, FlatRate, YieldCurve, SIMPLE, COMPOUND
+from main import main
 
 # Helper function to create a mock order book
 def create_mock_order_book():
@@ -63,3 +76,569 @@ def test_carry_trade_strategy_no_order_book():
     strategy_quotes = market_maker.carry_trade_strategy(N=3)
     
     assert len(strategy_quotes) == 0, "Strategy quotes should be empty if no order book data is available"
+
+# Tests for the batched carry trade engine
+def test_carry_trade_matrix_shape(market_maker):
+    quotes = market_maker.carry_trade_matrix(N=3)
+
+    assert quotes.expected_earnings.shape == (2, 3), "Earnings matrix should be ask levels x maturities"
+    assert len(quotes) == 6, "Columnar result should hold one quote per ask level and maturity"
+
+def test_carry_trade_matrix_matches_future_price(market_maker):
+    quotes = market_maker.carry_trade_matrix(N=5)
+
+    for j, maturity in enumerate(quotes.maturity_days):
+        future_price = market_maker.calculate_future_price(maturity_days=maturity)
+        assert quotes.future_prices[j] == pytest.approx(future_price), "Future prices should match calculate_future_price"
+        for i, ask in enumerate(market_maker.market_data_manager.current_order_book["ask"]):
+            expected_earnings = (future_price - ask["price"]) * ask["amount"]
+            assert quotes.expected_earnings[i, j] == pytest.approx(expected_earnings), "Earnings should match the per-quote formula"
+
+def test_carry_trade_strategy_columnar_adapter(market_maker):
+    quotes = market_maker.carry_trade_strategy(N=3, columnar=True)
+
+    assert quotes.to_dicts() == market_maker.carry_trade_strategy(N=3), "List-of-dicts adapter should match the default output"
+
+# Tests for the incremental order book
+def test_incremental_order_book_deltas():
+    book = IncrementalOrderBook.from_order_book(create_mock_order_book())
+
+    assert book.best_ask() == {"price": 98.5, "amount": 20}, "Best ask should be the lowest ask price"
+    assert book.best_bid() == {"price": 101, "amount": 50}, "Best bid should be the highest bid price"
+
+    book.apply_deltas([
+        {"action": "add", "side": "ask", "price": 98, "amount": 10},
+        {"action": "modify", "side": "ask", "price": 99, "amount": 5},
+        {"action": "cancel", "side": "bid", "price": 101},
+    ])
+
+    assert book.best_ask() == {"price": 98, "amount": 10}, "Added level should become the best ask"
+    assert book.best_bid() == {"price": 100.5, "amount": 30}, "Cancelled best bid should be replaced by the next level"
+    assert book.to_order_book()["ask"] == [
+        {"price": 98, "amount": 10},
+        {"price": 98.5, "amount": 20},
+        {"price": 99, "amount": 5},
+    ], "Ask levels should stay sorted by price"
+
+def test_incremental_order_book_removes_empty_levels():
+    book = IncrementalOrderBook.from_order_book(create_mock_order_book())
+
+    book.apply_delta({"action": "modify", "side": "ask", "price": 98.5, "amount": 0})
+    assert book.best_ask() == {"price": 99, "amount": 40}, "A level modified to 0 should be removed, not kept as the best ask"
+    assert book.pop_changes() == [{"side": "ask", "price": 98.5, "amount": 0}], "Removed level should be reported with amount 0"
+
+def test_market_data_manager_changed_levels(market_maker):
+    market_data_manager = market_maker.market_data_manager
+    market_data_manager.apply_order_book_deltas([{"action": "add", "side": "ask", "price": 98.5, "amount": 5}])
+
+    assert market_data_manager.current_order_book["ask"][0] == {"price": 98.5, "amount": 25}, "Current order book should reflect the delta"
+    assert market_data_manager.pop_changed_levels() == [{"side": "ask", "price": 98.5, "amount": 25}], "Changed level should be reported"
+    assert market_data_manager.pop_changed_levels() == [], "Changes should be reset once consumed"
+
+def test_assigned_book_replaces_incremental_view():
+    market_data_manager = MarketDataManager(OrderBookGenerator("Test Asset"))
+    market_maker = MarketMaker(market_data_manager, base_rate=0.05)
+    market_data_manager.update_order_book()
+    market_data_manager.stream_order_book()
+    market_maker.rank_carry_trades(N=3)
+
+    market_data_manager.current_order_book = create_mock_order_book()
+    assert len(market_maker.rank_carry_trades(N=3)) == 6, "Ranking should be rebuilt from the assigned book"
+
+    market_data_manager.apply_order_book_deltas([{"action": "add", "side": "ask", "price": 98.5, "amount": 5}])
+    assert market_data_manager.current_order_book["ask"] == [{"price": 98.5, "amount": 25}, {"price": 99, "amount": 40}], "Delta should land on the assigned book"
+
+# Tests for the incremental carry trade ranking
+def test_rank_carry_trades_matches_full_strategy(market_maker):
+    ranking = market_maker.rank_carry_trades(N=3)
+    earnings = [quote["expected_earnings"] for quote in ranking.ranked()]
+
+    assert len(ranking) == 6, "Ranking should hold one row per ask level and maturity"
+    assert earnings == sorted(earnings, reverse=True), "Quotes should be ranked by expected earnings"
+
+def test_rank_carry_trades_updates_changed_levels_only(market_maker):
+    ranking = market_maker.rank_carry_trades(N=3)
+    market_maker.market_data_manager.apply_order_book_deltas([{"action": "modify", "side": "ask", "price": 99, "amount": 400}])
+
+    assert market_maker.rank_carry_trades(N=3) is ranking, "Ranking should be updated in place when the spot price is unchanged"
+    assert ranking.top(1)[0]["sell_price"] == 99, "Re-ranked level should move to the top"
+
+    market_maker.market_data_manager.apply_order_book_deltas([{"action": "cancel", "side": "ask", "price": 98.5}])
+    assert market_maker.rank_carry_trades(N=3) is not ranking, "Ranking should be rebuilt when the spot price changes"
+
+# Tests for the top-K trades query
+def test_top_trades_matches_sorted_quotes(market_maker):
+    market_maker.market_data_manager.update_order_book(max_ask_items=50)
+    quotes = sorted(market_maker.carry_trade_strategy(N=5), key=lambda x: x["expected_earnings"], reverse=True)
+
+    top_trades = market_maker.top_trades(k=5, N=5)
+    assert [quote["expected_earnings"] for quote in top_trades] == [quote["expected_earnings"] for quote in quotes[:5]], "Top trades should match the best sorted quotes"
+
+    top_quotes = market_maker.carry_trade_matrix(N=5).top(5)
+    assert [quote["expected_earnings"] for quote in top_quotes] == [quote["expected_earnings"] for quote in quotes[:5]], "Columnar top should match the best sorted quotes"
+
+def test_top_trades_no_order_book():
+    market_data_manager = MarketDataManager(OrderBookGenerator("Test Asset"))
+    market_maker = MarketMaker(market_data_manager, base_rate=0.05)
+
+    assert market_maker.top_trades(k=3) == [], "Top trades should be empty if no order book data is available"
+
+# Tests for the growth factor cache
+def test_growth_factor_cache_hits_and_invalidation(market_maker):
+    market_maker.carry_trade_strategy(N=5)
+    market_maker.carry_trade_strategy(N=5)
+
+    info = market_maker.growth_cache_info()
+    assert (info["misses"], info["hits"]) == (5, 5), "Each maturity should be computed once and then served from the cache, with instrumentation off"
+
+    market_maker.base_rate = 0.03
+    assert market_maker.growth_cache_info()["size"] == 0, "Changing the base rate should invalidate the cache"
+    market_maker.carry_trade_strategy(N=5)
+    market_maker.term_structure = YieldCurve([30, 365], [0.02, 0.06])
+    assert market_maker.growth_cache_info()["size"] == 0, "Changing the term structure should invalidate the cache"
+
+def test_growth_factor_cache_lru_eviction():
+    cache = GrowthFactorCache(max_size=2)
+    curve = FlatRate(0.05)
+    cache.get(curve, 30)
+    cache.get(curve, 60)
+    cache.get(curve, 30)
+    cache.get(curve, 90)  # Evicts maturity 60, the least recently used
+
+    cache.get_many(curve, [30, 60])
+    assert cache.stats() == {"size": 2, "max_size": 2, "hits": 2, "misses": 4}, "Least recently used factor should be evicted"
+    assert cache.get(0.05, 30) == pytest.approx(curve.growth_factor(30)), "Plain rates should be continuously compounded"
+
+def test_top_trades_on_an_unsorted_ladder(market_maker):
+    # Walking in book order, the 102.5 level would end the walk before the cheaper 97 level
+    market_maker.market_data_manager.current_order_book = OrderBook(np.array([96.0]), np.array([1]), np.array([98.0, 102.5, 97.0]), np.array([50, 50, 50]))
+    quotes = sorted(market_maker.carry_trade_strategy(N=5), key=lambda x: x["expected_earnings"], reverse=True)
+
+    top_trades = market_maker.top_trades(k=3, N=5)
+    assert [quote["expected_earnings"] for quote in top_trades] == pytest.approx([quote["expected_earnings"] for quote in quotes[:3]]), "Unsorted asks should not end the walk early"
+    assert {quote["future_price"] for quote in top_trades} <= {quote["future_price"] for quote in quotes}, "Top trades should use the same spot price as the matrix"
+
+# Tests for the term structures
+def test_term_structure_compounding_conventions():
+    rate = 0.05
+
+    assert FlatRate(rate, SIMPLE).growth_factor(365) == pytest.approx(1.05), "Simple compounding should grow by 1 + r t"
+    assert FlatRate(rate, COMPOUND, frequency=4).growth_factor(365) == pytest.approx(1.0125 ** 4), "Compound interest should be paid `frequency` times a year"
+    assert FlatRate(rate).growth_factor(365) == pytest.approx(math.exp(rate)), "Continuous compounding should be the default"
+    assert FlatRate(rate).discount_factor(180) == pytest.approx(math.exp(-rate * 180 / 365)), "Discount factors should be the inverse of growth factors"
+    assert FlatRate(rate).growth_factor(1000) == pytest.approx(math.exp(rate * 1000 / 365)), "Maturities past the table should be computed directly"
+
+def test_yield_curve_interpolates_rates():
+    curve = YieldCurve.from_rates({30: 0.02, 90: 0.04, 365: 0.05})
+
+    assert curve.rates(np.array([10, 30, 60, 200, 400])) == pytest.approx([0.02, 0.02, 0.03, 0.04 + 0.01 * 110 / 275, 0.05]), "Rates should be linear between tenors and flat outside"
+    assert curve.growth_factors([60, 60.5]) == pytest.approx(np.exp(curve.rates(np.array([60, 60.5])) * np.array([60, 60.5]) / 365), rel=1e-6), "Table lookups should match the curve between whole days"
+
+    with pytest.raises(ValueError):
+        YieldCurve([90, 30], [0.02, 0.03])
+    with pytest.raises(TypeError):
+        TermStructure()
+
+def test_term_structure_lookup_counters():
+    curve = FlatRate(0.05, table_days=365)
+    STATS.reset()
+    STATS.enable()
+    try:
+        curve.growth_factors([30, 90, 365, 400])
+        curve.discount_factor(1000)
+    finally:
+        STATS.disable()
+
+    counters = STATS.snapshot()["counters"]
+    assert counters["term_structure.table_hits"] == 3, "Maturities inside the table should be counted as table hits"
+    assert counters["term_structure.computed"] == 2, "Maturities past the table should be counted as computed"
+
+def test_market_maker_prices_off_the_term_structure(market_maker):
+    curve = YieldCurve([30, 365], [0.02, 0.06], compounding=COMPOUND)
+    daily_maturities = list(range(1, 366))
+    market_maker.term_structure = curve
+
+    quotes = market_maker.carry_trade_matrix(N=len(daily_maturities), maturity_dates=daily_maturities)
+    assert quotes.future_prices == pytest.approx(99 * curve.growth_factors(daily_maturities)), "Future prices should use the curve on every maturity"
+    assert market_maker.calculate_future_price(maturity_days=200) == pytest.approx(99 * curve.growth_factor(200)), "Single future prices should use the curve"
+
+    assert market_maker.base_rate is None, "A curve has no single base rate"
+
+    market_maker.base_rate = 0.03
+    assert market_maker.calculate_future_price(maturity_days=90) == pytest.approx(99 * 1.03 ** (90 / 365)), "Setting a base rate should switch back to a flat curve"
+    assert MarketMaker(market_maker.market_data_manager, term_structure=FlatRate(0.04, SIMPLE)).base_rate == 0.04, "The base rate should come from the term structure"
+
+def test_base_rate_keeps_the_compounding_convention(market_maker):
+    market_maker.term_structure = FlatRate(0.05, COMPOUND, frequency=4)
+    market_maker.base_rate = 0.03
+
+    assert (market_maker.term_structure.compounding, market_maker.term_structure.frequency) == (COMPOUND, 4), "Setting a base rate should keep the compounding convention"
+    market_maker.display_strategy_quotes(market_maker.carry_trade_strategy(N=5))
+    assert any("compound compounding" in log_entry["data"] for log_entry in market_maker.logger.get_logs()), "The compounding convention should be displayed with the base rate"
+
+# Tests for the batched order book generator
+def test_generate_order_books_sorted_and_seeded():
+    order_book_generator = OrderBookGenerator("Test Asset")
+    order_books = order_book_generator.generate_order_books(num_books=20, max_ask_items=50, max_bid_items=40, seed=7)
+
+    assert order_books["ask"]["price"].shape == (20, 50), "Ask prices should be one row per book"
+    assert order_books["bid"]["amount"].shape == (20, 40), "Bid amounts should be one row per book"
+    assert (np.diff(order_books["ask"]["price"], axis=1) >= 0).all(), "Asks should be sorted lowest price first"
+    assert (np.diff(order_books["bid"]["price"], axis=1) <= 0).all(), "Bids should be sorted highest price first"
+
+    same_seed = order_book_generator.generate_order_books(num_books=20, max_ask_items=50, max_bid_items=40, seed=7)
+    assert np.array_equal(order_books["ask"]["price"], same_seed["ask"]["price"]), "Same seed should produce the same books"
+
+def test_iter_order_books_batches():
+    order_book_generator = OrderBookGenerator("Test Asset")
+    batches = list(order_book_generator.iter_order_books(25, batch_size=10, seed=1, max_ask_items=5))
+
+    assert [len(batch["ask"]["price"]) for batch in batches] == [10, 10, 5], "Batches should add up to the requested number of books"
+    order_book = OrderBookGenerator.order_book_from_batch(batches[0], 0)
+    assert len(order_book["ask"]) == 5, "Extracted book should keep every ask level"
+
+# Tests for the compact order book
+def test_order_book_dict_compatible_view():
+    order_book = OrderBook.from_dict(create_mock_order_book())
+
+    assert order_book["ask"][0] == {"price": 99, "amount": 40}, "Levels should be readable as dicts"
+    assert order_book == create_mock_order_book(), "OrderBook should compare equal to the dict format"
+    assert order_book.to_dict() == create_mock_order_book(), "to_dict should round-trip the dict format"
+    assert list(order_book.keys()) == ["bid", "ask"], "OrderBook should expose the same keys as the dict format"
+
+def test_order_book_slices_share_arrays():
+    order_book = OrderBookGenerator("Test Asset").generate_order_book(max_ask_items=100, max_bid_items=100)
+    top_asks = order_book["ask"][:10]
+
+    assert len(top_asks) == 10, "Slice should keep the requested number of levels"
+    assert np.shares_memory(top_asks.prices, order_book.ask_prices), "Slices should not copy the level arrays"
+    assert order_book.nbytes() == 200 * 16, "Each level should cost one float and one int"
+
+# Tests for the logger
+def test_logger_ring_buffer_capacity():
+    logger = Logger(capacity=3)
+    for i in range(5):
+        logger.log("Message %d", i)
+
+    assert [log_entry["data"] for log_entry in logger.get_logs()] == ["Message 2", "Message 3", "Message 4"], "Only the last entries should be kept"
+
+def test_logger_skips_disabled_levels():
+    class Unformattable:
+        def __str__(self):
+            raise AssertionError("Disabled messages should not be formatted")
+
+    logger = Logger(level=INFO)
+    logger.debug("Debug details: %s", Unformattable())
+
+    assert logger.get_logs() == [], "Debug messages should be dropped at INFO level"
+
+def test_logger_background_writer(tmp_path):
+    log_file = tmp_path / "simulator.log"
+    logger = Logger(log_file=str(log_file), flush_interval=0.01)
+    logger.log("Order book updated for asset %s", "SYMBOL")
+    logger.warning("Order book data is missing")
+    logger.close()
+
+    lines = log_file.read_text().splitlines()
+    assert lines[0].endswith("] INFO Order book updated for asset SYMBOL"), "Entries should be flushed to the log file"
+    assert lines[1].endswith("] WARNING Order book data is missing"), "Entries should be tagged with their severity"
+
+# Tests for the multi-asset simulator
+def test_multi_asset_simulator_cross_asset_ranking():
+    symbols = [f"SYMBOL{i}" for i in range(6)]
+    with MultiAssetSimulator(symbols, base_rate=0.05, processes=2) as simulator:
+        simulator.update_order_books(max_ask_items=20)
+        ranking = simulator.evaluate(N=3, top_k=2)
+
+        serial = MultiAssetSimulator([], base_rate=0.05, processes=1)
+        serial.markets = simulator.markets
+        assert ranking == serial.evaluate(N=3, top_k=2), "Process pool and serial evaluation should agree"
+
+    earnings = [quote["expected_earnings"] for quote in ranking]
+    assert len(ranking) == 12, "Each symbol should contribute its top quotes"
+    assert {quote["symbol"] for quote in ranking} == set(symbols), "Every symbol should be ranked"
+    assert earnings == sorted(earnings, reverse=True), "Ranking should be sorted by expected earnings"
+
+# Tests for the headless tick simulator
+def test_tick_simulator_report(market_maker):
+    simulator = TickSimulator(market_maker, tick_rate=0, N=3)
+    report = simulator.run(ticks=50)
+
+    assert report["evaluated_ticks"] == 50, "Unpaced run should evaluate every tick"
+    assert report["skipped_ticks"] == 0, "Unpaced run should never coalesce ticks"
+    assert report["latency_p50_us"] <= report["latency_p99_us"], "Latency percentiles should be ordered"
+
+def test_tick_simulator_coalesces_when_behind(market_maker):
+    simulator = TickSimulator(market_maker, tick_rate=1e6, N=3, incremental=False)
+    report = simulator.run(ticks=500)
+
+    assert report["skipped_ticks"] > 0, "Ticks should be coalesced when the target rate cannot be met"
+    assert report["evaluated_ticks"] + report["skipped_ticks"] == 500, "Coalesced and evaluated ticks should cover the schedule"
+
+# Tests for the asyncio book pipeline
+def test_book_pipeline_coalesces_stale_books():
+    market_data_manager = MarketDataManager(OrderBookGenerator("Test Asset"))
+    fast_consumer = StrategyConsumer(MarketMaker(MarketDataManager(OrderBookGenerator("Test Asset")), base_rate=0.05))
+
+    async def slow_sink(tick, trades):
+        await asyncio.sleep(0.01)
+
+    slow_consumer = StrategyConsumer(MarketMaker(MarketDataManager(OrderBookGenerator("Test Asset")), base_rate=0.05), sinks=[slow_sink])
+
+    source = generator_source(market_data_manager, count=50, interval=0.001)
+    stats = asyncio.run(BookPipeline(source, [fast_consumer, slow_consumer]).run())
+
+    assert stats["produced"] == 50, "Every book from the source should be published"
+    for consumer_stats in stats["consumers"]:
+        assert consumer_stats["processed"] + consumer_stats["coalesced"] == 50, "Books should be either processed or coalesced"
+        assert consumer_stats["last_tick"] == 49, "Consumers should always end on the latest book"
+    assert stats["consumers"][1]["coalesced"] > 0, "Slow consumer should skip stale books"
+
+def test_socket_source_round_trip():
+    async def run():
+        feed = generator_source(MarketDataManager(OrderBookGenerator("Test Asset")), count=5)
+        server = await serve_feed(feed)
+        port = server.sockets[0].getsockname()[1]
+        order_books = [order_book async for order_book in socket_source("127.0.0.1", port)]
+        server.close()
+        await server.wait_closed()
+        return order_books
+
+    order_books = asyncio.run(run())
+    assert len(order_books) == 5, "Every book should be received from the socket feed"
+    assert len(order_books[0]["ask"]) == 15, "Books should keep every level over the socket"
+
+# Tests for binary recording and replay
+def test_book_recording_replay(tmp_path):
+    path = str(tmp_path / "books.bin")
+    market_data_manager = MarketDataManager(OrderBookGenerator("Test Asset"))
+
+    order_books = []
+    with BookRecorder(path) as recorder:
+        market_data_manager.recorder = recorder
+        for _ in range(20):
+            market_data_manager.update_order_book()
+            order_books.append(market_data_manager.current_order_book)
+
+    replay = BookReplay(path, chunk_size=7)
+    replayed = list(replay)
+
+    assert len(replay) == 20, "Every produced book should be recorded"
+    assert [tick for tick, _, _ in replayed] == list(range(20)), "Ticks should be replayed in order"
+    assert all(order_book == replayed_book for order_book, (_, _, replayed_book) in zip(order_books, replayed)), "Replayed books should match the recorded ones"
+    assert replay.order_book(13) == order_books[13], "Random access by tick should return the recorded book"
+
+def test_book_replay_through_strategy(tmp_path, market_maker):
+    path = str(tmp_path / "books.bin")
+    with BookRecorder(path) as recorder:
+        recorder.record(create_mock_order_book())
+
+    (tick, quotes), = BookReplay(path).replay(market_maker, N=3)
+    assert tick == 0, "Replay should start at the first recorded tick"
+    assert quotes.to_dicts() == market_maker.carry_trade_strategy(N=3), "Replayed book should produce the same quotes"
+
+# Tests for the backtesting engine
+def test_backtest_matches_strategy_per_tick():
+    order_book_generator = OrderBookGenerator("Test Asset")
+    order_books = order_book_generator.generate_order_books(num_books=30, max_ask_items=10, seed=3)
+    rates = np.linspace(0.01, 0.05, 30)
+
+    result = Backtest.from_order_books(order_books, rates, step_days=1, maturity_dates=[30, 60, 90]).run(batch_size=8)
+
+    for tick in (0, 17, 29):
+        market_data_manager = MarketDataManager(order_book_generator)
+        market_data_manager.current_order_book = OrderBookGenerator.order_book_from_batch(order_books, tick)
+        best_trade, = MarketMaker(market_data_manager, base_rate=rates[tick]).top_trades(k=1, N=3, maturity_dates=[30, 60, 90])
+
+        position = np.flatnonzero(result.open_tick == tick)[0]
+        assert result.sell_price[position] == best_trade["sell_price"], "Backtest should open the strategy's best trade"
+        assert result.expected_earnings[position] == pytest.approx(best_trade["expected_earnings"], abs=0.01), "Expected earnings should match the strategy"
+
+def test_backtest_realizes_positions_at_maturity():
+    ask_prices = np.full((10, 1), 100.0)
+    ask_amounts = np.full((10, 1), 10)
+
+    result = Backtest(ask_prices, ask_amounts, rates=0.05, step_days=1, maturity_dates=[3], funding_rates=0.05).run(min_earnings=-1)
+
+    assert result.summary()["realized_positions"] == 7, "Positions maturing inside the series should be realized"
+    assert result.realized_pnl[result.realized] == pytest.approx(0.0, abs=1e-9), "Funding at the pricing rate should cancel the carry"
+    assert result.pnl[-1] == pytest.approx(0.0, abs=1e-9), "Cumulative P&L should add up realized positions"
+
+def test_backtest_batches_within_memory_budget():
+    order_books = OrderBookGenerator("Test Asset").generate_order_books(num_books=20, max_ask_items=10, seed=5)
+    backtest = Backtest.from_order_books(order_books, 0.03, step_days=1, maturity_dates=[30, 60, 90])
+
+    expected = backtest.run(trades_per_tick=2)
+    budgeted = backtest.run(trades_per_tick=2, batch_size=4096, max_elements=30)  # One tick of 10 levels x 3 maturities per batch
+    assert np.array_equal(budgeted.expected_earnings, expected.expected_earnings), "Batches capped by the memory budget should give the same positions"
+
+    empty = Backtest(np.empty((0, 10)), np.empty((0, 10)), rates=0.03).run()
+    assert len(empty) == 0 and empty.pnl.size == 0 and empty.summary()["positions"] == 0, "An empty series should give an empty result"
+    assert len(Backtest([], [], rates=[]).run()) == 0, "An empty series without levels should give an empty result"
+
+# Tests for the parameter sweep
+def test_sweep_carry_trades_matches_strategy(market_maker):
+    rates = [0.01, 0.05, 0.1]
+    sweep = market_maker.sweep_carry_trades(rates, maturity_dates=[30, 90])
+
+    assert sweep.expected_earnings.shape == (3, 2, 2), "Sweep should return a rate x maturity x level tensor"
+    for r, rate in enumerate(rates):
+        market_maker.base_rate = rate
+        quotes = market_maker.carry_trade_matrix(N=2, maturity_dates=[30, 90])
+        assert sweep.expected_earnings[r] == pytest.approx(quotes.expected_earnings.T), "Each rate slice should match the strategy at that rate"
+
+def test_sweep_carry_trades_uses_term_structure_compounding(market_maker):
+    market_maker.term_structure = FlatRate(0.05, SIMPLE)
+    sweep = market_maker.sweep_carry_trades([0.05], maturity_dates=[365])
+
+    assert sweep.future_prices[0, 0] == pytest.approx(market_maker.carry_trade_matrix(N=1, maturity_dates=[365]).future_prices[0]), "Sweep and strategy should price with the same convention"
+    assert sweep.future_prices[0, 0] == pytest.approx(99 * 1.05), "Simple compounding should be applied to the swept rate"
+
+    backtest = Backtest(np.array([[98.5, 99.0]]), np.array([[20, 40]]), rates=0.05, step_days=1, maturity_dates=[365], compounding=SIMPLE).run()
+    assert backtest.future_price[0] == pytest.approx(98.5 * 1.05), "Backtests should support the same compounding conventions"
+
+def test_sweep_carry_trades_parallel_chunks(market_maker):
+    rates = np.linspace(0.0, 0.1, 1000)
+    serial = market_maker.sweep_carry_trades(rates)
+    parallel = market_maker.sweep_carry_trades(rates, workers=4, chunk_size=64)
+
+    assert np.array_equal(serial.expected_earnings, parallel.expected_earnings), "Parallel chunks should produce the same tensor"
+    assert parallel.best_by_rate()["expected_earnings"].shape == (1000,), "Best trade should be reported for every rate"
+
+# Tests for the fill simulator
+def test_fill_simulator_walks_the_book(market_maker):
+    fill_simulator = market_maker.fill_simulator(N=2)
+
+    fill = fill_simulator.fill(30)  # 20 units at 98.5, then 10 units at 99
+    assert fill["filled"] == 30, "Fill should be complete when there is enough liquidity"
+    assert fill["cost"] == pytest.approx(20 * 98.5 + 10 * 99), "Fill should consume the cheapest levels first"
+    assert fill["vwap"] == pytest.approx((20 * 98.5 + 10 * 99) / 30), "VWAP should be the cost per unit"
+    assert fill["slippage"] == pytest.approx(fill["vwap"] - 98.5), "Slippage should be measured from the best ask"
+
+    future_price = market_maker.calculate_future_price(maturity_days=30)
+    assert fill["expected_earnings"][0] == pytest.approx(future_price * 30 - fill["cost"]), "Earnings should use the fill cost and the strategy's spot price"
+
+def test_fill_simulator_caps_at_liquidity(market_maker):
+    fills = market_maker.fill_simulator().fill_many([20, 60, 1000])
+
+    assert fills["filled"].tolist() == [20, 60, 60], "Fills should be capped at the available liquidity"
+    assert fills["vwap"][0] == pytest.approx(98.5), "A fill within the best level should cost the best price"
+
+# Tests for the instrumentation
+def test_stats_disabled_by_default():
+    stats = Stats()
+
+    assert stats.timer("stage") is stats.timer("other stage"), "Disabled timers should be a shared no-op"
+    stats.count("quotes_produced", 10)
+    assert stats.snapshot() == {"timers": {}, "counters": {}}, "Nothing should be recorded while disabled"
+
+def test_stats_timers_and_counters():
+    stats = Stats()
+    stats.enable()
+
+    @stats.timed("work")
+    def work():
+        return 42
+
+    for _ in range(10):
+        assert work() == 42, "Timed functions should return their result"
+    with stats.timer("block"):
+        pass
+    stats.count("books_processed", 3)
+
+    snapshot = stats.snapshot()
+    assert snapshot["timers"]["work"]["count"] == 10, "Every call should be timed"
+    assert snapshot["timers"]["block"]["count"] == 1, "Context manager timer should be recorded"
+    assert snapshot["timers"]["work"]["p50"] <= snapshot["timers"]["work"]["max"], "Percentiles should not exceed the max"
+    assert snapshot["counters"] == {"books_processed": 3}, "Counters should accumulate"
+
+def test_stats_wired_into_market_maker(market_maker):
+    STATS.reset()
+    STATS.enable()
+    try:
+        market_maker.market_data_manager.update_order_book()
+        market_maker.carry_trade_strategy(N=5)
+    finally:
+        STATS.disable()
+
+    snapshot = STATS.snapshot()
+    assert {"order_book.update", "order_book.sort", "strategy.carry_trade_matrix"} <= set(snapshot["timers"]), "Stages should be timed"
+    assert snapshot["counters"]["quotes_produced"] == 75, "Quotes produced should be counted"
+
+def test_stats_profile_capture():
+    stats = Stats()
+    stats.start_profile()
+    sorted(range(1000), reverse=True)
+    report = stats.stop_profile()
+
+    assert "function calls" in report, "Profile capture should return a pstats report"
+    assert not stats.profiling, "Profiling should stop after the report"
+
+# Tests for the fast quote table renderer
+def test_quote_table_renderer_matches_tabulate(market_maker):
+    market_maker.market_data_manager.update_order_book(max_ask_items=30)
+    strategy_quotes = market_maker.carry_trade_strategy(N=5)
+
+    tabulated = market_maker.display_strategy_quotes(strategy_quotes)
+    assert market_maker.display_strategy_quotes(strategy_quotes, limit=len(strategy_quotes)) == tabulated, "Fast path should match tabulate's layout"
+
+def test_quote_table_renderer_pages_and_caches(market_maker):
+    market_maker.market_data_manager.update_order_book(max_ask_items=30)
+    strategy_quotes = market_maker.carry_trade_strategy(N=5)
+    tabulated_rows = market_maker.display_strategy_quotes(strategy_quotes).split("\n")[3:-1]
+
+    page = market_maker.display_strategy_quotes(strategy_quotes, limit=10, offset=5).split("\n")
+    assert len(page) == 14, "Only the visible rows should be rendered"
+    assert page[3:-1] == tabulated_rows[5:15], "Page should hold the same rows as the full table"
+
+    renderer = QuoteTableRenderer()
+    wide_row = (100.25, 365, 102.53, 100, 227.82)
+    first_frame = renderer.render([wide_row, (99.5, 30, 99.91, 7, 2.86)])
+    widths = list(renderer.widths)
+
+    second_frame = renderer.render([(99.5, 30, 99.91, 7, 2.86)])
+    assert renderer.widths == widths, "Column widths should not shrink between frames"
+    assert second_frame.split("\n")[3] == first_frame.split("\n")[4], "A row should render to the same line from one frame to the next"
+
+# Tests for the non-interactive startup path
+def test_main_headless_runs_without_prompts(capsys):
+    main(["--base-rate", "0.04", "--headless", "--ticks", "20"])
+
+    report = capsys.readouterr().out
+    assert "Evaluated ticks:    20" in report, "Headless mode should run the requested number of ticks"
+
+def test_components_import_defers_tabulate():
+    result = subprocess.run([sys.executable, "-c", "import sys, components; print('tabulate' in sys.modules)"], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False", "tabulate should only be imported by the text output paths"
+
+# Tests for the copy-on-write book versions
+def test_book_versions_share_unchanged_sides():
+    market_data_manager = MarketDataManager(OrderBookGenerator("Test Asset"))
+    market_data_manager.update_order_book(max_ask_items=10, max_bid_items=10)
+    market_data_manager.apply_order_book_deltas([{"action": "modify", "side": "ask", "price": 101.5, "amount": 7}])
+    first = market_data_manager.versions.latest
+    market_data_manager.apply_order_book_deltas([{"action": "add", "side": "ask", "price": 101.5, "amount": 3}])
+    second = market_data_manager.versions.latest
+
+    assert second.version == first.version + 1, "Every published book should get the next version"
+    assert second.order_book.bid_prices is first.order_book.bid_prices, "An untouched side should be shared, not copied"
+    assert second.order_book.ask_amounts is not first.order_book.ask_amounts, "A changed side should get new arrays"
+    assert market_data_manager.versions.get(first.version) is first, "Retained versions should be retrievable"
+
+def test_published_books_are_immutable():
+    market_data_manager = MarketDataManager(OrderBookGenerator("Test Asset"))
+    market_data_manager.update_order_book()
+    order_book = market_data_manager.current_order_book
+    best_ask = order_book["ask"][0]
+
+    with pytest.raises(ValueError):
+        order_book.ask_amounts[0] = 0
+
+    market_data_manager.stream_order_book(num_changes=20)
+    assert order_book["ask"][0] == best_ask, "A reader holding an older version should not see later updates"
+    assert market_data_manager.current_order_book is not order_book, "Updates should publish a new book"
+
+    prices, amounts = np.array([99.0, 100.0]), np.array([10, 20])
+    market_data_manager.current_order_book = OrderBook(prices[::-1], amounts[::-1], prices, amounts)
+    prices[0] = 98.0
+    assert market_data_manager.current_order_book["ask"][0]["price"] == 99.0, "Publishing should copy arrays the caller still owns"